@@ -0,0 +1,232 @@
+import re
+import sys
+import zlib
+import random
+import hashlib
+
+from preprocess import preprocess
+
+# Mersenne prime of the MinHash permutations a * x + b mod p
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+SUBJECT_PREFIX = re.compile(r"^\s*(?:(?:re|fw|fwd|aw|wg)\s*[:_]\s*|\[[^\]]*\]\s*)+", re.IGNORECASE)
+# copy suffix of saved messages, e.g. "... contact form_3"
+COPY_SUFFIX = re.compile(r"[_ ]\d+$")
+WORD = re.compile(r"\w+")
+
+
+def normalize_subject(subject):
+    """Subject without Re:/Fw: prefixes, copy suffixes, case and extra whitespace."""
+    subject = SUBJECT_PREFIX.sub("", subject or "")
+    return " ".join(COPY_SUFFIX.sub("", subject.strip()).lower().split())
+
+
+def shingles(text, size=5):
+    """crc32 hashes of the word size-grams of text (the whole text if it is shorter)."""
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def _lsh_shape(num_perm, threshold):
+    # bands * rows = num_perm, with the LSH threshold (1 / bands) ** (1 / rows) closest to threshold
+    shapes = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(shapes, key=lambda shape: abs((1 / shape[0]) ** (1 / shape[1]) - threshold))
+
+
+class UnionFind:
+    """Disjoint sets whose root is always the member added first."""
+
+    def __init__(self):
+        self.parent = {}
+        self.order = {}
+
+    def add(self, key):
+        if key not in self.parent:
+            self.parent[key] = key
+            self.order[key] = len(self.order)
+
+    def find(self, key):
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if self.order[root_b] < self.order[root_a]:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+        return root_a
+
+
+class DedupIndex:
+    """
+    Incremental clustering of near-duplicate messages and threads.
+
+    Messages are joined when their thread headers link them (Message-ID referenced by
+    In-Reply-To/References), when their cleaned bodies are identical, or when the MinHash
+    estimate of the Jaccard similarity of their word shingles reaches threshold. Candidates
+    come from an LSH index over signature bands, so adding a message does not compare it
+    with the whole corpus. Messages with the same normalized subject are joined at the
+    lower subject_threshold. The representative of a cluster is its first message.
+    Bodies with fewer than min_shingles shingles (e.g. empty or "See attached") say too
+    little to compare, so they are only joined through their thread headers.
+
+    Parameters:
+    - threshold (float, optional): Body similarity for near duplicates. Default is 0.8.
+    - subject_threshold (float, optional): Body similarity for messages with the same
+      normalized subject. Default is 0.5.
+    - num_perm (int, optional): MinHash signature length. Default is 128.
+    - shingle_size (int, optional): Words per shingle. Default is 5.
+    - min_shingles (int, optional): Shingles a body needs to be compared. Default is 3.
+    - seed (int, optional): Seed of the MinHash permutations. Default is 1.
+    """
+
+    def __init__(self, threshold=0.8, subject_threshold=0.5, num_perm=128, shingle_size=5, min_shingles=3, seed=1):
+        self.threshold = threshold
+        self.subject_threshold = subject_threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.bands, self.rows = _lsh_shape(num_perm, min(threshold, subject_threshold))
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = {}
+        self.subjects = {}
+        self.exact = {}
+        self.message_ids = {}
+        self.pending_references = {}
+        self.clusters_ = UnionFind()
+
+    def signature(self, text, hashes=None):
+        """MinHash signature of the word shingles of text."""
+        hashes = shingles(text, self.shingle_size) if hashes is None else hashes
+        if not hashes:
+            return (MAX_HASH,) * self.num_perm
+        return tuple(min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes) for a, b in self.permutations)
+
+    def similarity(self, a, b):
+        """Estimated Jaccard similarity of two indexed messages (0 if either body was too short to compare)."""
+        if a not in self.signatures or b not in self.signatures:
+            return 0.0
+        sig_a, sig_b = self.signatures[a], self.signatures[b]
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / self.num_perm
+
+    def add(self, key, text, subject=None, message_id=None, in_reply_to=None, references=()):
+        """
+        Index a message and join it to its cluster.
+
+        Returns:
+        - The key of the representative of the message's cluster (key itself if it is new).
+        """
+        union = self.clusters_
+        union.add(key)
+
+        # thread headers, in either arrival order
+        linked = [ref for ref in [in_reply_to, *references] if ref]
+        for ref in linked:
+            if ref in self.message_ids:
+                union.union(self.message_ids[ref], key)
+            else:
+                self.pending_references.setdefault(ref, []).append(key)
+        if message_id:
+            self.message_ids[message_id] = key
+            for other in self.pending_references.pop(message_id, []):
+                union.union(key, other)
+
+        normalized = normalize_subject(subject) if subject else None
+        self.subjects[key] = normalized
+        hashes = shingles(text, self.shingle_size)
+        if len(hashes) < self.min_shingles:
+            return union.find(key)
+
+        # identical cleaned bodies
+        digest = hashlib.sha256(" ".join(text.split()).lower().encode("utf-8")).hexdigest()
+        if digest in self.exact:
+            union.union(self.exact[digest], key)
+        else:
+            self.exact[digest] = key
+
+        # near duplicates through the LSH bands
+        signature = self.signature(text, hashes)
+        self.signatures[key] = signature
+        candidates = set()
+        for band, buckets in enumerate(self.buckets):
+            band_key = signature[band * self.rows:(band + 1) * self.rows]
+            candidates.update(buckets.get(band_key, ()))
+            buckets.setdefault(band_key, []).append(key)
+        for other in candidates:
+            same_subject = normalized and self.subjects.get(other) == normalized
+            if self.similarity(key, other) >= (self.subject_threshold if same_subject else self.threshold):
+                union.union(other, key)
+        return union.find(key)
+
+    def representative(self, key):
+        return self.clusters_.find(key)
+
+    def clusters(self):
+        """Representative -> keys of its cluster, in the order they were added."""
+        clusters = {}
+        for key in self.clusters_.order:
+            clusters.setdefault(self.clusters_.find(key), []).append(key)
+        return clusters
+
+
+def dedup_extract(records, extract, index=None, max_tokens=1024):
+    """
+    Extract only one representative per cluster of a stream of MailRecords.
+
+    Each record is cleaned with preprocess and added to the index. If its cluster was
+    already extracted, the representative's result is reused, with "Duplicate Of" set to
+    the representative's source; otherwise extract(record) is called.
+
+    Parameters:
+    - records (iterable): MailRecords, e.g. from mailbox_reader.iter_mail.
+    - extract (callable): Function of a record returning its extraction dict.
+    - index (DedupIndex, optional): Index to continue from. Default is a new one.
+    - max_tokens (int, optional): Token budget of the cleaned bodies compared.
+
+    Yields:
+    - tuple: The record and its result.
+    """
+    index = index or DedupIndex()
+    results = {}
+    for record in records:
+        if record.error is not None:
+            yield record, {"File": record.source, "Error": record.error}
+            continue
+        text = preprocess(record.body, max_tokens)["text"]
+        representative = index.add(record.source, text, record.subject, record.message_id,
+                                   record.in_reply_to, record.references)
+        if representative in results:
+            yield record, dict(results[representative], **{"Duplicate Of": representative})
+            continue
+        result = extract(record)
+        results[record.source] = result
+        yield record, result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python dedup.py <file_or_directory>...")
+    else:
+        from mailbox_reader import iter_mail
+
+        index = DedupIndex()
+        for record in iter_mail(sys.argv[1:]):
+            if record.error is None:
+                index.add(record.source, preprocess(record.body)["text"], record.subject, record.message_id,
+                          record.in_reply_to, record.references)
+        for representative, members in index.clusters().items():
+            if len(members) > 1:
+                print(f"{representative}:")
+                for member in members[1:]:
+                    print(f"  {member} ({index.similarity(representative, member):.2f})")
@@ -1,84 +1,156 @@
 import extract_msg
 import re
 import os
-import spacy
-from spacy.language import Language
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from extraction_cache import PARSED, ExtractionCache, file_digest
+import preprocess
 
 
-nlp = spacy.load("en_core_web_sm")
-
 def remove_signature(text):
-    """Remove common email signatures."""
-    patterns = [
-        r"--\s*$",  # line consisting of double dash
-        r"Thanks,?|Best,?|Regards,?|Sincerely,?|Cheers,?",  # common closing phrases
-        r"^\w+ \w+$"  # the start of a signature
-    ]
-    signature_regex = re.compile('|'.join(patterns), re.IGNORECASE | re.MULTILINE)
-    lines = text.splitlines()
-    signature_start_index = None
-    for i, line in enumerate(lines):
-        if signature_regex.search(line):
-            signature_start_index = i
-            break
-    if signature_start_index is not None:
-        return '\n'.join(lines[:signature_start_index]).strip()
-    else:
-        return text.strip()
+    """Remove the signature (closing phrase or "--" line and what follows) from the end of the text."""
+    return '\n'.join(preprocess.remove_signature(text.splitlines())).strip()
 
 
-def clean_text(text):
-    """Clean the message body to make it suitable for LLM processing."""
-    text = remove_signature(text)  # Remove signatures
-    text = re.sub('<[^<]+?>', '', text)  # Remove HTML tags
+def clean_body(text, max_tokens=preprocess.DEFAULT_MAX_TOKENS, tokenizer=None):
+    """
+    Clean the message body to make it suitable for LLM processing: keep the newest message
+    (and a forwarded one), drop quoted history, disclaimers and the signature, remove
+    HTML, URLs and email addresses, and cut it to max_tokens tokens of the target model.
+    Without a tokenizer, preprocess.target_tokenizer() is used, which falls back to
+    estimated counts when the model's tokenizer cannot be loaded.
+
+    Returns:
+    - tuple: The cleaned body and the number of tokens saved compared to the raw body.
+    """
+    if tokenizer is None:
+        tokenizer = preprocess.target_tokenizer()
+    tokens_before = preprocess.count_tokens(text, tokenizer)
+    text = preprocess.preprocess(text, max_tokens, tokenizer)["text"]
     text = re.sub(r'http\S+', '', text)  # Remove URLs
     text = re.sub(r'\S*@\S*\s?', '', text)  # Remove email addresses
     text = ' '.join(text.split())  # Normalize whitespace
-    return text.strip()
+    text = text.strip()
+    return text, tokens_before - preprocess.count_tokens(text, tokenizer)
+
+
+def clean_text(text):
+    """Clean the message body to make it suitable for LLM processing."""
+    return clean_body(text)[0]
 
 
 def parse_msg(file_path):
-    """Parse the .msg file and extract required details."""
+    """
+    Parse the .msg file and extract required details. A file that cannot be parsed
+    gives an error record with the file and the error instead of the details.
+    """
     try:
         with extract_msg.Message(file_path) as msg:
             sender = msg.sender
             receiver = msg.to
             subject = msg.subject
             body = msg.body
-            cleaned_body = clean_text(body)
+            cleaned_body, tokens_saved = clean_body(body or "")
     except Exception as e:
-        print(f"Failed to process file {file_path: {e}}")
-        return None
+        return {"File": file_path, "Error": f"{type(e).__name__}: {e}"}
     
     return {
+        "File": file_path,
         "Sender": sender,
         "Receiver": receiver,
         "Subject": subject,
-        "Cleaned Body": cleaned_body
+        "Cleaned Body": cleaned_body,
+        "Tokens Saved": tokens_saved
     }
 
 
-def process_directory(directory_path):
-    results = []
-    for file_name in os.listdir(directory_path):
-        if file_name.lower().endswith('.msg'):
-            file_path = os.path.join(directory_path, file_name)
-            result = parse_msg(file_path)
-            results.append(result)
-    
-    return results
+def list_msg_files(directory_path):
+    return sorted(os.path.join(directory_path, file_name) for file_name in os.listdir(directory_path)
+                  if file_name.lower().endswith('.msg'))
+
+
+def iter_directory(directory_path, workers=None, max_pending=None, cache=None):
+    """
+    Parse the .msg files of a directory in a process pool, yielding each result as 
+    soon as it is ready (so in completion order, not file order).
+
+    At most max_pending files (default 4 per worker) are queued at a time, so memory
+    stays bounded on folders of thousands of messages. workers=1 parses in this process.
+    With an ExtractionCache, messages parsed before (same bytes) are read from the
+    cache and only new messages are parsed.
+    """
+    file_paths = list_msg_files(directory_path)
+    digests = {}
+    if cache is not None:
+        misses = []
+        for file_path in file_paths:
+            digest = file_digest(file_path)
+            cached = cache.get(digest, PARSED)
+            if cached is None:
+                digests[file_path] = digest
+                misses.append(file_path)
+            else:
+                yield dict(cached, File=file_path)
+        file_paths = misses
+
+    for result in parse_files(file_paths, workers, max_pending):
+        if cache is not None and "Error" not in result:
+            cache.put(digests[result["File"]], PARSED, result)
+        yield result
+
+
+def parse_files(file_paths, workers=None, max_pending=None):
+    """Run parse_msg over file_paths in a bounded process pool, in completion order."""
+    workers = min(workers or os.cpu_count() or 1, max(len(file_paths), 1))
+    if workers == 1:
+        yield from map(parse_msg, file_paths)
+        return
+
+    max_pending = max_pending or 4 * workers
+    remaining = iter(file_paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for file_path in remaining:
+            pending.add(executor.submit(parse_msg, file_path))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            for file_path in remaining:
+                pending.add(executor.submit(parse_msg, file_path))
+                if len(pending) >= max_pending:
+                    break
+
+
+def process_directory(directory_path, workers=None, cache=None):
+    """Parse every .msg file of a directory, returning the results in file order."""
+    return sorted(iter_directory(directory_path, workers, cache=cache), key=lambda result: result["File"])
 
 
 def print_results(results):
     for index, result in enumerate(results):
         print(f"Message {index + 1}:")
+        if "Error" in result:
+            print(f"  Failed to process file {result['File']}: {result['Error']}")
+            print("-" * 40)
+            continue
         print(f"  Sender: {result['Sender']}")
         print(f"  Receiver: {result['Receiver']}")
         print(f"  Subject: {result['Subject']}")
         print(f"  Cleaned Body: {result['Cleaned Body']}")
+        print(f"  Tokens Saved: {result.get('Tokens Saved', 0)}")
         print("-" * 40)  # Separator
 
 
 if __name__ == "__main__":
-    results = process_directory('data')
+    # python emailScraper.py [directory] [workers] [cache_path]
+    directory_path = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if len(sys.argv) > 3:
+        with ExtractionCache(sys.argv[3]) as cache:
+            results = process_directory(directory_path, workers, cache)
+    else:
+        results = process_directory(directory_path, workers)
     print_results(results)
\ No newline at end of file
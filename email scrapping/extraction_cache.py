@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+DEFAULT_CACHE_PATH = "extraction_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+# bump when parse_msg/clean_text change what they return, so old parsed fields are dropped
+PARSER_VERSION = "parse-2"
+
+PARSED = "parsed"
+EXTRACTED = "extracted"
+
+
+def message_digest(raw_bytes):
+    """sha256 of the raw message bytes: the same email always gets the same key."""
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def file_digest(file_path):
+    with open(file_path, "rb") as file:
+        return message_digest(file.read())
+
+
+def schema_version(json_schema, prompt="", model=""):
+    """Short version string of an extraction setup; it changes whenever the schema, prompt or model does."""
+    setup = json.dumps({"schema": json_schema, "prompt": prompt, "model": model}, sort_keys=True)
+    return "schema-" + hashlib.sha256(setup.encode("utf-8")).hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    Persistent SQLite cache of parsed email fields and extracted JSON.
+
+    Entries are keyed by the sha256 of the raw message bytes plus a version: PARSER_VERSION
+    for the parse_msg fields and the schema_version of the extraction setup for the
+    final JSON. Opening the cache drops the entries of other versions, so changing the
+    schema or prompt invalidates old extractions automatically. When the stored values
+    exceed max_bytes, the least recently used entries are evicted.
+
+    Parameters:
+    - path (str, optional): SQLite file. Default is extraction_cache.sqlite.
+    - extraction_version (str, optional): Current schema_version, required to read or
+      store extracted results. None keeps every extraction version and only allows the
+      parsed stage.
+    - max_bytes (int, optional): Size limit of the stored values. Default is 256 MB.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, extraction_version=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.extraction_version = extraction_version
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                digest TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (digest, stage, version)
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.purge_stale()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _version(self, stage):
+        if stage == PARSED:
+            return PARSER_VERSION
+        if self.extraction_version is None:
+            raise ValueError("Extracted results need a cache opened with an extraction_version, "
+                             "e.g. ExtractionCache(path, llm_extractor.extraction_version())")
+        return self.extraction_version
+
+    def purge_stale(self):
+        """Delete the entries written by other parser or schema versions."""
+        with self.connection:
+            self.connection.execute("DELETE FROM entries WHERE stage = ? AND version != ?", (PARSED, PARSER_VERSION))
+            if self.extraction_version is not None:
+                self.connection.execute("DELETE FROM entries WHERE stage = ? AND version != ?",
+                                        (EXTRACTED, self.extraction_version))
+
+    def get(self, digest, stage):
+        """Return the cached value of a message for a stage (PARSED or EXTRACTED), or None."""
+        version = self._version(stage)
+        row = self.connection.execute("SELECT value FROM entries WHERE digest = ? AND stage = ? AND version = ?",
+                                      (digest, stage, version)).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE entries SET accessed = ? WHERE digest = ? AND stage = ? AND version = ?",
+                                    (time.time(), digest, stage, version))
+        return json.loads(row[0])
+
+    def put(self, digest, stage, value):
+        """Store the value of a message for a stage, then evict if the cache is too large."""
+        data = json.dumps(value, ensure_ascii=False)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                    (digest, stage, self._version(stage), data, len(data.encode("utf-8")), time.time()))
+        self.evict()
+
+    def get_or_compute(self, digest, stage, compute):
+        """Return the cached value, or compute, store and return it."""
+        value = self.get(digest, stage)
+        if value is None:
+            value = compute()
+            self.put(digest, stage, value)
+        return value
+
+    def size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self):
+        """Delete least recently used entries until the stored values fit in max_bytes."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return 0
+        rows = self.connection.execute("SELECT digest, stage, version, size FROM entries ORDER BY accessed")
+        evicted = []
+        for digest, stage, version, size in rows:
+            if excess <= 0:
+                break
+            evicted.append((digest, stage, version))
+            excess -= size
+        with self.connection:
+            self.connection.executemany("DELETE FROM entries WHERE digest = ? AND stage = ? AND version = ?", evicted)
+        return len(evicted)
+
+    def stats(self):
+        """Number of entries per stage and the total stored size in bytes."""
+        counts = dict(self.connection.execute("SELECT stage, COUNT(*) FROM entries GROUP BY stage").fetchall())
+        return {"entries": counts, "bytes": self.size(), "path": os.path.abspath(self.path)}
@@ -2,11 +2,12 @@ import sys
 import os
 import extract_msg
 import re
+import preprocess
 
 def extract_text_from_html(html):
-    # Remove HTML tags
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', html)
+    # Remove HTML tags, quoted history, disclaimers and the signature; the text file
+    # is not an LLM prompt, so the body is not cut to a token budget
+    cleantext = preprocess.preprocess(html, max_tokens=None)["text"]
     # Remove URLs
     cleantext = re.sub(r'http\S+', '', cleantext)
     return cleantext
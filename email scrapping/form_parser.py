@@ -0,0 +1,158 @@
+import re
+
+# Known form layouts: the subject that identifies them, their labels in order (form key,
+# label as it appears on its own line), how the labelled values fill the extraction
+# schema, contact details returned after the schema fields, and schema values that are
+# fixed for the form.
+FORM_TEMPLATES = {
+    "media_enquiry": {
+        "subject": r"New submission from Media Enquiries contact form",
+        "labels": [
+            ("name", "Your name (first and last)"),
+            ("email", "Email address"),
+            ("phone", "Phone number"),
+            ("outlet", "Name of media outlet"),
+            ("interview_type", "What kind of interview are you seeking?"),
+            ("request", "Describe the nature of your request"),
+            ("deadline", "Deadline"),
+        ],
+        # fields the form answers directly; SERVICE and TYPE need judgment like UNIT
+        "schema_fields": {"OUTLET": "outlet", "JOURNALIST": "name"},
+        "contact_fields": {"JOURNALIST EMAIL": "email", "JOURNALIST PHONE": "phone",
+                           "INTERVIEW TYPE": "interview_type", "DEADLINE": "deadline"},
+        # COMPLEXITY is the only field documented as fixed ("Always ouput 3")
+        "fixed": {"COMPLEXITY": "3"},
+        # the free text the remaining (judgment) fields are extracted from
+        "judgment_source": "request",
+    },
+}
+
+# a form is recognized without its subject when at least this share of its labels is found
+MIN_LABEL_SHARE = 0.7
+
+
+def _compile(template):
+    label_lines = [r"^[ \t]*" + re.escape(label) + r"[ \t]*[:*]?[ \t]*$" for _, label in template["labels"]]
+    return {
+        "subject": re.compile(template["subject"], re.IGNORECASE),
+        "labels": re.compile("|".join(f"(?P<f{i}>{line})" for i, line in enumerate(label_lines)), re.MULTILINE),
+    }
+
+
+COMPILED_TEMPLATES = {name: _compile(template) for name, template in FORM_TEMPLATES.items()}
+
+
+def _find_labels(name, text):
+    # (form key, start, end) of each label found, in text order
+    keys = [key for key, _ in FORM_TEMPLATES[name]["labels"]]
+    found = []
+    for match in COMPILED_TEMPLATES[name]["labels"].finditer(text):
+        key = keys[int(match.lastgroup[1:])]
+        if key not in [k for k, _, _ in found]:
+            found.append((key, match.start(), match.end()))
+    return found
+
+
+def detect_template(text, subject=None):
+    """Name of the form layout of a message, or None for free-form email."""
+    for name, template in FORM_TEMPLATES.items():
+        if subject and COMPILED_TEMPLATES[name]["subject"].search(subject):
+            return name
+        if len(_find_labels(name, text)) >= MIN_LABEL_SHARE * len(template["labels"]):
+            return name
+    return None
+
+
+def _clean_value(value):
+    lines = [line.strip() for line in value.replace("\xa0", " ").splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def parse_form(text, subject=None):
+    """
+    Read the labelled fields of a form submission.
+
+    Returns:
+    - tuple: Template name and dict of form key -> value (empty fields are left out),
+      or None if the message is not a known form.
+    """
+    name = detect_template(text, subject)
+    if name is None:
+        return None
+    found = _find_labels(name, text)
+    fields = {}
+    for i, (key, _, end) in enumerate(found):
+        next_start = found[i + 1][1] if i + 1 < len(found) else len(text)
+        value = _clean_value(text[end:next_start])
+        if i + 1 == len(found):
+            # the last field is followed by the form footer, keep its first line only
+            value = value.split("\n")[0] if value else value
+        if value:
+            fields[key] = value
+    return name, fields
+
+
+def extract_form(text, subject=None, date=None, team_member=None, schema=None, use_llm=True, api_url=None):
+    """
+    Fill the extraction schema of a form submission without the generic LLM path.
+
+    Labelled values (e.g. OUTLET and JOURNALIST) and fixed values are filled directly,
+    and the journalist's contact details are added after the schema fields. Only the
+    fields that need judgment (e.g. SERVICE, TYPE or UNIT) go to llm_extractor.extract,
+    with the free-text part of the form as the email instead of the whole message. With
+    use_llm=False they are set to "None" and no request is made.
+
+    Parameters:
+    - text (str): Raw message body; emailScraper.clean_text joins the lines the labels are on.
+    - subject (str, optional): Subject line, used to recognize the form.
+    - date (str, optional): Date the message was forwarded (DATE field).
+    - team_member (str, optional): Person who forwarded it (TEAM MEMBER field).
+    - schema (dict, optional): Extraction schema. Default is llm_extractor.JSON_SCHEMA.
+    - use_llm (bool, optional): If False, never call the LLM. Default is True.
+    - api_url (str, optional): Endpoint for the judgment fields.
+
+    Returns:
+    - tuple: The extraction dict (schema order, then the contact fields found) and the
+      form fields, or None if the message is not a known form.
+    """
+    import llm_extractor
+
+    parsed = parse_form(text, subject)
+    if parsed is None:
+        return None
+    name, form = parsed
+    template = FORM_TEMPLATES[name]
+    schema = schema or llm_extractor.JSON_SCHEMA
+    properties = schema["properties"]
+
+    result = {field: value for field, value in template["fixed"].items() if field in properties}
+    for field, key in template["schema_fields"].items():
+        if field in properties and key in form:
+            result[field] = form[key]
+    if date is not None and "DATE" in properties:
+        result["DATE"] = date
+    if team_member is not None and "TEAM MEMBER" in properties:
+        result["TEAM MEMBER"] = team_member
+
+    judgment = [field for field in properties if field not in result]
+    source = form.get(template["judgment_source"])
+    if judgment and use_llm and source:
+        subschema = {"properties": {field: properties[field] for field in judgment}}
+        options = {"api_url": api_url} if api_url else {}
+        result.update(llm_extractor.extract(source, subschema, **options))
+    extraction = {field: result.get(field, llm_extractor.MISSING_VALUE) for field in properties}
+    for field, key in template.get("contact_fields", {}).items():
+        if key in form:
+            extraction[field] = form[key]
+    return extraction, form
+
+
+def extract_email(text, subject=None, date=None, team_member=None, **options):
+    """Use the form fast path for known forms and llm_extractor.extract for everything else."""
+    import llm_extractor
+
+    extracted = extract_form(text, subject, date, team_member, **options)
+    if extracted is not None:
+        return extracted[0]
+    llm_options = {key: options[key] for key in ("schema", "api_url") if options.get(key) is not None}
+    return llm_extractor.extract(text, **llm_options)
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import aiohttp
+
+from llm_extractor import DEFAULT_API_URL, JSON_SCHEMA, extraction_steps, read_email_text
+
+# statuses of an endpoint that is cold-starting or rate limiting, worth retrying
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncLLMClient:
+    """
+    Asyncio client of a Hugging Face style text-generation endpoint.
+
+    One keep-alive connection pool is shared by all requests. At most max_in_flight
+    requests run at once, and a token bucket limits how many start per second. 429/5xx
+    answers (e.g. "Model is currently loading") and timeouts are retried with
+    exponential backoff, honouring Retry-After and the endpoint's estimated_time.
+
+    Parameters:
+    - api_url (str, optional): Endpoint URL. Default is the Llama 3 8B Instruct endpoint.
+    - max_in_flight (int, optional): Concurrent requests. Default is 8.
+    - rate (float, optional): Requests started per second. Default is 5.
+    - burst (int, optional): Token bucket capacity. Default is rate.
+    - timeout (float, optional): Seconds per request attempt. Default is 60.
+    - max_retries (int, optional): Retries per request. Default is 5.
+    - backoff (float, optional): First retry delay in seconds, doubled each retry. Default is 1.
+    - max_backoff (float, optional): Longest retry delay in seconds. Default is 30.
+    - token (str, optional): Bearer token. Default is the HF_TOKEN environment variable.
+
+    Use it as an async context manager: `async with AsyncLLMClient(url) as client: ...`.
+    """
+
+    def __init__(self, api_url=DEFAULT_API_URL, max_in_flight=8, rate=5.0, burst=None, timeout=60.0,
+                 max_retries=5, backoff=1.0, max_backoff=30.0, token=None):
+        self.api_url = api_url
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.token = token if token is not None else os.environ.get("HF_TOKEN")
+        self.session = None
+
+    async def __aenter__(self):
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, headers=headers,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.bucket = TokenBucket(self.rate, self.burst)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def generate(self, prompt, max_new_tokens=512, temperature=0.1):
+        """Send one generation request, retrying transient failures, and return the generated text."""
+        payload = {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": max_new_tokens,
+                "num_return_sequences": 1,
+                "temperature": temperature,
+                "return_full_text": False
+            }
+        }
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with self.session.post(self.api_url, json=payload) as response:
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            return (await response.json())[0]["generated_text"]
+                        retry_after = await _retry_after(response)
+                        error = aiohttp.ClientResponseError(response.request_info, response.history,
+                                                            status=response.status, message=response.reason)
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self._delay(attempt, retry_after))
+
+
+async def _retry_after(response):
+    if "Retry-After" in response.headers:
+        try:
+            return float(response.headers["Retry-After"])
+        except ValueError:
+            return None
+    # Hugging Face answers a cold start with {"error": ..., "estimated_time": seconds}
+    try:
+        return float((await response.json(content_type=None)).get("estimated_time"))
+    except (ValueError, TypeError, AttributeError, aiohttp.ContentTypeError):
+        return None
+
+
+async def extract_async(client, email_text, schema=JSON_SCHEMA, max_reasks=2, cache=None, taxonomy=None, digest=None):
+    """Async version of llm_extractor.extract over an AsyncLLMClient, with the same steps."""
+    steps = extraction_steps(email_text, schema, client.api_url, max_reasks, cache, taxonomy, digest)
+    try:
+        prompt, max_new_tokens = next(steps)
+        while True:
+            prompt, max_new_tokens = steps.send(await client.generate(prompt, max_new_tokens=max_new_tokens))
+    except StopIteration as done:
+        return done.value
+
+
+async def extract_many(email_texts, schema=JSON_SCHEMA, max_reasks=2, cache=None, taxonomy=None, **client_options):
+    """
+    Extract many emails concurrently. Returns one result per email, in input order; an
+    email whose requests keep failing gives an {"Error": ...} record instead. cache and
+    taxonomy are used as in llm_extractor.extract.
+    """
+    async with AsyncLLMClient(**client_options) as client:
+        results = await asyncio.gather(*[extract_async(client, text, schema, max_reasks, cache, taxonomy)
+                                         for text in email_texts], return_exceptions=True)
+    return [{"Error": f"{type(result).__name__}: {result}"} if isinstance(result, Exception) else result
+            for result in results]
+
+
+def run_batch(email_texts, schema=JSON_SCHEMA, max_reasks=2, cache=None, taxonomy=None, **client_options):
+    """Blocking wrapper of extract_many."""
+    return asyncio.run(extract_many(email_texts, schema, max_reasks, cache, taxonomy, **client_options))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the schema fields of many emails concurrently.")
+    parser.add_argument("files", nargs="+", help="email files (only data/safe_on_cloud on hosted endpoints)")
+    parser.add_argument("--url", default=DEFAULT_API_URL, help="endpoint, e.g. http://localhost:8080 for stub_server.py")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_batch([read_email_text(path) for path in args.files], api_url=args.url,
+                        max_in_flight=args.max_in_flight, rate=args.rate, timeout=args.timeout)
+    print(json.dumps(dict(zip(args.files, results)), indent=4))
+    print(f"{len(results)} emails in {time.perf_counter() - start:.2f}s", file=sys.stderr)
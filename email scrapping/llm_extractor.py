@@ -0,0 +1,281 @@
+import os
+import re
+import sys
+import json
+import email
+from email import policy
+import requests
+
+from extraction_cache import EXTRACTED, message_digest, schema_version
+from preprocess import preprocess, target_tokenizer
+
+# Only emails from data/safe_on_cloud may be sent to the hosted endpoint.
+DEFAULT_API_URL = "https://api-inference.huggingface.co/models/meta-llama/Meta-Llama-3-8B-Instruct"
+
+# schema of task3.ipynb
+JSON_SCHEMA = {
+    "properties": {
+        "DATE": {
+            "type": "string",
+            "description": "The date when the email was forwarded to the scraper"
+        },
+        "SERVICE": {
+            "type": "string",
+            "description": "Description of the service mentioned in the email"
+        },
+        "TYPE": {
+            "type": "string",
+            "description": "Type of document or release, e.g., 'Media Release'"
+        },
+        "UNIT": {
+            "type": "string",
+            "description": "Unit within the organization, e.g., 'Medicine'"
+        },
+        "DEPARTMENT": {
+            "type": "string",
+            "description": "Specific department involved, if applicable"
+        },
+        "LEAD_EXPERT": {
+            "type": "string",
+            "description": "Lead expert or researcher mentioned in the email"
+        },
+        "OUTLET": {
+            "type": "string",
+            "description": "Media outlet the request comes from, e.g., 'CTV News Vancouver'"
+        },
+        "JOURNALIST": {
+            "type": "string",
+            "description": "Name of the journalist making the request"
+        },
+        "CAMPAIGN": {
+            "type": "string",
+            "description": "Campaign associated with the content, e.g., 'Teaching, Learning and Research'"
+        },
+        "COMPLEXITY": {
+            "type": "string",
+            "description": "Always ouput 3"
+        },
+        "DIVERSITY": {
+            "type": "string",
+            "description": "Diversity information, if any."
+        },
+        "TEAM MEMBER": {
+            "type": "string",
+            "description": "Person forwarding the email or people mentioned, dynamically tagged to the sender, e.g., 'Kurt Heinrich'."
+        },
+        "KEY MESSAGING": {
+            "type": "string",
+            "description": "Key messaging included in the email, can be left empty."
+        },
+    }
+}
+
+PROMPT_TEMPLATE = """This is the email content:
+{email}
+
+Extract the following fields from the email and answer with one JSON object with exactly these keys.
+Every value is a string; use "None" when the email does not mention it.
+{fields}
+
+JSON:
+"""
+
+# value used for fields that are still invalid after the re-asks, as in jj_email_1.json
+MISSING_VALUE = "None"
+# generated tokens per requested field, enough for a short sentence
+TOKENS_PER_FIELD = 48
+
+session = requests.Session()
+
+
+def build_prompt(email_text, schema=JSON_SCHEMA, fields=None):
+    """Prompt asking for the given fields (default all) of the schema in one JSON object."""
+    properties = schema["properties"]
+    fields = fields or list(properties)
+    lines = "\n".join(f'- "{field}": {properties[field].get("description", "")}' for field in fields)
+    return PROMPT_TEMPLATE.format(email=email_text, fields=lines)
+
+
+def query(prompt, api_url=DEFAULT_API_URL, max_new_tokens=512, temperature=0.1, timeout=60):
+    """Send one generation request and return the generated text."""
+    headers = {"Authorization": f"Bearer {os.environ['HF_TOKEN']}"}
+    response = session.post(api_url, headers=headers, timeout=timeout, json={
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": max_new_tokens,
+            "num_return_sequences": 1,
+            "temperature": temperature,
+            "return_full_text": False
+        }
+    })
+    response.raise_for_status()
+    return response.json()[0]["generated_text"]
+
+
+def parse_json(text, fields):
+    """
+    Read the generated JSON object. If the output is cut off or malformed, fall back to
+    the "KEY": "value" pairs that can be read, so the valid fields are kept.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            value = json.loads(text[start:end + 1])
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+    parsed = {}
+    for field in fields:
+        match = re.search(r'"' + re.escape(field) + r'"\s*:\s*(?:"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?))', text)
+        if match:
+            parsed[field] = json.loads(f'"{match.group(1)}"') if match.group(1) is not None else match.group(2)
+    return parsed
+
+
+def validate(value, schema=JSON_SCHEMA, fields=None):
+    """
+    Check the generated values against the schema.
+
+    Returns:
+    - tuple: Dict of the valid fields and list of the fields that are missing or invalid.
+    """
+    properties = schema["properties"]
+    valid, failed = {}, []
+    for field in fields or list(properties):
+        field_schema = properties[field]
+        item = value.get(field)
+        if isinstance(item, (int, float)) and not isinstance(item, bool) and field_schema.get("type") == "string":
+            item = str(item)
+        ok = isinstance(item, str) and item.strip() != ""
+        if ok and "enum" in field_schema:
+            ok = item in field_schema["enum"]
+        if ok and "pattern" in field_schema:
+            ok = re.fullmatch(field_schema["pattern"], item) is not None
+        if ok:
+            valid[field] = item.strip()
+        else:
+            failed.append(field)
+    return valid, failed
+
+
+def cache_key(email_text, schema=JSON_SCHEMA, api_url=DEFAULT_API_URL, taxonomy=None, digest=None):
+    """
+    ExtractionCache key of an extraction: the message plus everything that changes the
+    answer, i.e. the extraction_version of schema and endpoint and the taxonomy table.
+
+    The message is identified by digest (the message_digest of its raw bytes) when given,
+    otherwise by the sha256 of the text that is sent.
+    """
+    setup = extraction_version(schema, api_url)
+    if taxonomy is not None:
+        setup += "|" + taxonomy.identity()
+    message = digest or message_digest(email_text.encode("utf-8"))
+    return message_digest(f"{message}|{setup}".encode("utf-8"))
+
+
+def extraction_steps(email_text, schema=JSON_SCHEMA, api_url=DEFAULT_API_URL, max_reasks=2, cache=None,
+                     taxonomy=None, digest=None):
+    """
+    The extraction of one email as a generator, shared by extract and the async client.
+
+    It yields (prompt, max_new_tokens) requests and expects the generated text to be sent
+    back; its return value is the extraction. Cache lookups, the taxonomy candidates and
+    the re-asks all happen here, so every client behaves the same.
+    """
+    key = cache_key(email_text, schema, api_url, taxonomy, digest) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key, EXTRACTED)
+        if cached is not None:
+            return cached
+
+    prompt_schema = schema
+    if taxonomy is not None:
+        from taxonomy import constrain_schema
+        prompt_schema = constrain_schema(schema, email_text, taxonomy)
+
+    fields = list(schema["properties"])
+    result = {}
+    for _ in range(max_reasks + 1):
+        generated = yield build_prompt(email_text, prompt_schema, fields), TOKENS_PER_FIELD * len(fields) + 16
+        valid, fields = validate(parse_json(generated, fields), prompt_schema, fields)
+        result.update(valid)
+        if not fields:
+            break
+    result = {field: result.get(field, MISSING_VALUE) for field in schema["properties"]}
+
+    if taxonomy is not None:
+        from taxonomy import normalize_extraction
+        result = normalize_extraction(result, taxonomy)
+    if key is not None:
+        cache.put(key, EXTRACTED, result)
+    return result
+
+
+def extract(email_text, schema=JSON_SCHEMA, api_url=DEFAULT_API_URL, max_reasks=2, cache=None, taxonomy=None,
+            digest=None):
+    """
+    Extract the schema fields of an email with one generation request.
+
+    The whole schema is asked for at once and the answer is validated locally; only the
+    fields that fail are asked for again, up to max_reasks times, before they are set
+    to "None". This replaces the one request per field of the notebook Jsonformer.
+
+    Parameters:
+    - email_text (str): Cleaned email text (only data that is safe to send to the cloud).
+    - schema (dict, optional): JSON schema with the fields to extract. Default is JSON_SCHEMA.
+    - api_url (str, optional): Hugging Face inference endpoint. The token is read from
+      the HF_TOKEN environment variable.
+    - max_reasks (int, optional): Number of re-asks for failed fields. Default is 2.
+    - cache (ExtractionCache, optional): Cache of extractions; an email that was already
+      extracted with the same schema, prompt, endpoint and taxonomy table is not sent again.
+    - taxonomy (TaxonomyIndex, optional): If given, the taxonomy fields list only the
+      table.json entries closest to the email's subject and first paragraph, and their answers are mapped to table names.
+    - digest (str, optional): message_digest of the raw message bytes, used as the cache
+      key of the message. Default is the sha256 of email_text.
+
+    Returns:
+    - dict: One string per schema field, in schema order.
+    """
+    steps = extraction_steps(email_text, schema, api_url, max_reasks, cache, taxonomy, digest)
+    try:
+        prompt, max_new_tokens = next(steps)
+        while True:
+            prompt, max_new_tokens = steps.send(query(prompt, api_url, max_new_tokens=max_new_tokens))
+    except StopIteration as done:
+        return done.value
+
+
+def extraction_version(schema=JSON_SCHEMA, api_url=DEFAULT_API_URL):
+    """schema_version of this extractor, for ExtractionCache(extraction_version=...)."""
+    return schema_version(schema, PROMPT_TEMPLATE, api_url)
+
+
+def read_email_text(file_path):
+    """Headers and plain-text body of an .eml file, or the contents of a text file."""
+    if not file_path.lower().endswith(".eml"):
+        with open(file_path, encoding="utf-8", errors="replace") as file:
+            return file.read()
+    with open(file_path, "rb") as file:
+        message = email.message_from_binary_file(file, policy=policy.default)
+    body = message.get_body(preferencelist=("plain", "html"))
+    headers = "\n".join(f"{name}: {message[name]}" for name in ("From", "To", "Date", "Subject") if message[name])
+    return headers + "\n\n" + (body.get_content() if body is not None else "")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python llm_extractor.py <email_file> [output_json]")
+    else:
+        processed = preprocess(read_email_text(sys.argv[1]), tokenizer=target_tokenizer())
+        print(f"Prompt trimmed by {processed['tokens_saved']} tokens", file=sys.stderr)
+        if processed["truncated"]:
+            print(f"Email cut to {processed['tokens_after']} tokens", file=sys.stderr)
+        extraction = extract(processed["text"])
+        json_string = json.dumps(extraction, indent=4)
+        if len(sys.argv) > 2:
+            with open(sys.argv[2], "w") as json_file:
+                json_file.write(json_string)
+            print("successfully save as " + sys.argv[2])
+        else:
+            print(json_string)
@@ -0,0 +1,193 @@
+import os
+import sys
+import email
+import mailbox
+from email import policy
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from extraction_cache import message_digest
+from preprocess import strip_html
+
+MAILDIR_SUBDIRS = {"cur", "new", "tmp"}
+
+
+@dataclass
+class MailRecord:
+    """One message of any source, with the fields the extraction pipeline uses."""
+    source: str
+    digest: str = ""
+    message_id: Optional[str] = None
+    sender: Optional[str] = None
+    receiver: Optional[str] = None
+    cc: Optional[str] = None
+    date: Optional[str] = None
+    subject: Optional[str] = None
+    body: str = ""
+    in_reply_to: Optional[str] = None
+    references: List[str] = field(default_factory=list)
+    # attachment file names; their bytes only with include_attachments
+    attachments: List[str] = field(default_factory=list)
+    attachment_data: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def _header(message, name):
+    value = message.get(name)
+    return str(value) if value is not None else None
+
+
+def record_from_bytes(raw, source, include_attachments=False):
+    """Parse the raw bytes of an RFC 822 message (.eml, mbox or Maildir entry) into a MailRecord."""
+    message = email.message_from_bytes(raw, policy=policy.default)
+    body_part = message.get_body(preferencelist=("plain", "html"))
+    body = ""
+    if body_part is not None:
+        body = body_part.get_content()
+        if body_part.get_content_subtype() == "html":
+            body = strip_html(body)
+
+    record = MailRecord(
+        source=source,
+        digest=message_digest(raw),
+        message_id=_header(message, "Message-ID"),
+        sender=_header(message, "From"),
+        receiver=_header(message, "To"),
+        cc=_header(message, "Cc"),
+        date=_header(message, "Date"),
+        subject=_header(message, "Subject"),
+        body=body,
+        in_reply_to=_header(message, "In-Reply-To"),
+        references=(_header(message, "References") or "").split(),
+    )
+    # attachments and inline images are listed by name and only decoded when asked for
+    for part in message.iter_attachments():
+        name = part.get_filename() or part.get_content_type()
+        record.attachments.append(name)
+        if include_attachments:
+            record.attachment_data[name] = part.get_payload(decode=True)
+    return record
+
+
+def read_eml(path, include_attachments=False):
+    with open(path, "rb") as file:
+        return record_from_bytes(file.read(), path, include_attachments)
+
+
+def read_msg(path, include_attachments=False):
+    """Read an Outlook .msg file (needs extract_msg) into a MailRecord."""
+    import extract_msg
+
+    with open(path, "rb") as file:
+        digest = message_digest(file.read())
+    with extract_msg.Message(path) as msg:
+        record = MailRecord(
+            source=path,
+            digest=digest,
+            message_id=msg.messageId,
+            sender=msg.sender,
+            receiver=msg.to,
+            cc=msg.cc,
+            date=str(msg.date) if msg.date else None,
+            subject=msg.subject,
+            body=msg.body or strip_html(msg.htmlBody.decode("utf-8", "replace") if msg.htmlBody else ""),
+            in_reply_to=msg.inReplyTo,
+        )
+        for attachment in msg.attachments:
+            name = getattr(attachment, "longFilename", None) or getattr(attachment, "shortFilename", None) or "attachment"
+            record.attachments.append(name)
+            if include_attachments:
+                record.attachment_data[name] = attachment.data
+    return record
+
+
+def iter_mailbox(box, source, include_attachments=False):
+    # one message in memory at a time: keys are listed, then each entry is read on its own
+    for key in box.iterkeys():
+        yield _safe(lambda: record_from_bytes(box.get_bytes(key), f"{source}#{key}", include_attachments),
+                    f"{source}#{key}")
+
+
+def _safe(read, source):
+    try:
+        return read()
+    except Exception as e:
+        return MailRecord(source=source, error=f"{type(e).__name__}: {e}")
+
+
+def _is_maildir(path):
+    return os.path.isdir(path) and MAILDIR_SUBDIRS <= set(os.listdir(path))
+
+
+def _is_mbox(path):
+    if path.lower().endswith(".mbox"):
+        return True
+    with open(path, "rb") as file:
+        return file.read(5) == b"From "
+
+
+def iter_mail(sources, include_attachments=False):
+    """
+    Stream the messages of .msg and .eml files, mbox files, Maildir folders and
+    directories of any of these, as MailRecords.
+
+    Messages are read one at a time, so memory stays flat however large the mailbox is.
+    Attachments and images are only listed by name unless include_attachments is True.
+    A message that cannot be read gives a MailRecord with error set instead of stopping
+    the stream.
+
+    Parameters:
+    - sources (str or list): Files and/or directories.
+    - include_attachments (bool, optional): If True, also return attachment bytes. Default is False.
+
+    Yields:
+    - MailRecord: One record per message.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    for source in sources:
+        if _is_maildir(source):
+            yield from iter_mailbox(mailbox.Maildir(source, factory=None, create=False), source, include_attachments)
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                if _is_maildir(root):
+                    yield from iter_mailbox(mailbox.Maildir(root, factory=None, create=False), root, include_attachments)
+                    dirs[:] = [d for d in dirs if d not in MAILDIR_SUBDIRS]
+                    continue
+                yield from iter_mail([os.path.join(root, name) for name in sorted(files)
+                                      if name.lower().endswith((".msg", ".eml", ".mbox"))], include_attachments)
+                dirs.sort()
+        elif source.lower().endswith(".msg"):
+            yield _safe(lambda: read_msg(source, include_attachments), source)
+        elif source.lower().endswith(".eml"):
+            yield _safe(lambda: read_eml(source, include_attachments), source)
+        elif _is_mbox(source):
+            yield from iter_mailbox(mailbox.mbox(source, factory=None, create=False), source, include_attachments)
+
+
+def parse_record(record):
+    """The parse_msg result of a MailRecord, so records feed the rest of the pipeline."""
+    from emailScraper import clean_body
+
+    if record.error is not None:
+        return {"File": record.source, "Error": record.error}
+    cleaned_body, tokens_saved = clean_body(record.body)
+    return {
+        "File": record.source,
+        "Sender": record.sender,
+        "Receiver": record.receiver,
+        "Subject": record.subject,
+        "Cleaned Body": cleaned_body,
+        "Tokens Saved": tokens_saved
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python mailbox_reader.py <file_or_directory>... [--attachments]")
+    else:
+        from emailScraper import print_results
+
+        sources = [arg for arg in sys.argv[1:] if arg != "--attachments"]
+        records = iter_mail(sources, include_attachments="--attachments" in sys.argv)
+        print_results(parse_record(record) for record in records)
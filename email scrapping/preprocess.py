@@ -0,0 +1,206 @@
+import re
+import sys
+import html
+import math
+from functools import lru_cache
+
+DEFAULT_MAX_TOKENS = 1024
+DEFAULT_TOKENIZER = "meta-llama/Meta-Llama-3-8B-Instruct"
+# characters per token used to estimate counts when no tokenizer is given
+CHARS_PER_TOKEN = 4
+# a signature is only looked for in the last lines of the message
+SIGNATURE_MAX_LINES = 12
+TRUNCATION_MARK = " [...]"
+
+# any start or end tag; <name@example.com> and <https://...> are not tags
+HTML_TAG = re.compile(r"</?[a-z][a-z0-9]*(?:\s[^<>]*)?/?>", re.IGNORECASE)
+HTML_BLOCK = re.compile(r"<(style|script)\b.*?</\1>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+# tags that end a line, so the line-based history and signature rules still apply
+HTML_LINE_BREAK = re.compile(r"<(?:br|/p|/div|/tr|/li|/h[1-6])\b[^<>]*>", re.IGNORECASE)
+
+# start of the forwarded message, which usually carries the actual request
+FORWARD_MARKER = re.compile(
+    r"^\s*(?:-{2,}\s*Forwarded message\s*-{2,}|Begin forwarded message:?)\s*$", re.IGNORECASE)
+# start of quoted history: reply attribution, Outlook separator or a header block
+REPLY_MARKER = re.compile(
+    r"^\s*(?:On .{0,200}wrote:|-{2,}\s*Original Message\s*-{2,}|_{10,})\s*$", re.IGNORECASE)
+HEADER_LINE = re.compile(r"^\s*\**(From|Sent|Date|To|Cc|Subject)\**:\s*(.*)$", re.IGNORECASE)
+QUOTED_LINE = re.compile(r"^\s*>")
+DISCLAIMER = re.compile(
+    r"^\s*(?:CONFIDENTIALITY NOTICE|This (?:e-?mail|message)(?: and any attachments?)? (?:is|are|may be) "
+    r"(?:confidential|intended)|Please consider the environment|Sent from my (?:iPhone|iPad|Android|mobile)"
+    r"|Get Outlook for)", re.IGNORECASE)
+SIGNATURE_DELIMITER = re.compile(r"^\s*--\s*$")
+# a closing phrase on a line of its own, e.g. "Thanks," or "Warmest regards,"
+CLOSING = re.compile(
+    r"^\s*(?:thanks(?: (?:so much|again|a lot))?|thank you|many thanks|best|all the best|regards"
+    r"|(?:kind|best|warm|warmest) regards|sincerely|cheers)\s*[,.!]?\s*$", re.IGNORECASE)
+# forwarded header lines kept for the model (who sent the original and what about)
+KEPT_HEADERS = {"from", "subject"}
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(model_id=DEFAULT_TOKENIZER):
+    """Load the target model's tokenizer once per process (needs transformers)."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_id)
+
+
+@lru_cache(maxsize=None)
+def target_tokenizer(model_id=DEFAULT_TOKENIZER):
+    """
+    The target model's tokenizer, or None when it cannot be loaded (e.g. transformers is
+    not installed), in which case token counts are estimated; the fallback is reported once.
+    """
+    try:
+        return load_tokenizer(model_id)
+    except Exception as e:
+        print(f"Token counts are estimated: the {model_id} tokenizer is not available ({type(e).__name__})",
+              file=sys.stderr)
+        return None
+
+
+def count_tokens(text, tokenizer=None):
+    """Number of tokens of text with the tokenizer, or an estimate without one."""
+    if tokenizer is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def truncate_tokens(text, max_tokens, tokenizer=None):
+    """Cut text to at most max_tokens tokens, keeping the beginning."""
+    if count_tokens(text, tokenizer) <= max_tokens:
+        return text, False
+    if tokenizer is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK)]
+        cut = cut[:cut.rfind(" ")] if " " in cut else cut
+    else:
+        ids = tokenizer.encode(text, add_special_tokens=False)
+        mark_tokens = count_tokens(TRUNCATION_MARK, tokenizer)
+        cut = tokenizer.decode(ids[:max(max_tokens - mark_tokens, 0)])
+    return cut.rstrip() + TRUNCATION_MARK, True
+
+
+def strip_html(text):
+    """Remove style/script blocks, comments and HTML tags and decode entities; text without tags is returned as is."""
+    if not HTML_TAG.search(text):
+        return text
+    text = HTML_LINE_BREAK.sub(lambda match: match.group(0) + "\n", HTML_BLOCK.sub("", text))
+    return html.unescape(HTML_TAG.sub("", text))
+
+
+def remove_signature(lines):
+    """
+    Drop the signature from the end of a list of lines: everything after a "--" line or
+    a closing phrase on its own line, looked for in the last SIGNATURE_MAX_LINES lines only,
+    so a "Thanks" or a two-word line early in the message never cuts the body.
+    """
+    start = max(len(lines) - SIGNATURE_MAX_LINES, 0)
+    for i in range(start, len(lines)):
+        if SIGNATURE_DELIMITER.match(lines[i]) or CLOSING.match(lines[i]):
+            # keep the body when the message is nothing but a closing line
+            return lines[:i] if any(line.strip() for line in lines[:i]) else lines
+    return lines
+
+
+def split_message(text, keep_forwarded=True):
+    """
+    Separate the newest message from quoted and forwarded history in one pass over the lines.
+    Disclaimer paragraphs are dropped on the way.
+
+    A header block at the very start (e.g. From/To/Date/Subject put before the body by
+    llm_extractor.read_email_text) belongs to the newest message and is kept as is. For a
+    forward of a forward, the innermost forwarded message is kept, as it carries the request.
+
+    Returns:
+    - tuple: Lists of lines, one for the newest message and, with keep_forwarded, one for
+      the forwarded message (reduced to its From/Subject headers and body), and the number
+      of history lines removed.
+    """
+    lines = text.splitlines()
+    segments = [[]]
+    start = 0
+    while start < len(lines) and HEADER_LINE.match(lines[start]):
+        segments[0].append(lines[start].strip())
+        start += 1
+    history_lines = 0
+    forward_start = None
+    in_headers = False
+    in_disclaimer = False
+    for i in range(start, len(lines)):
+        line = lines[i]
+        header = HEADER_LINE.match(line)
+        # Outlook quotes history and forwards under a bare From:/Sent:/To: block; it is
+        # kept like a forward, as it is the message being answered
+        header_block = header is not None and header.group(1).lower() == "from" \
+            and i + 1 < len(lines) and HEADER_LINE.match(lines[i + 1]) is not None
+        if FORWARD_MARKER.match(line) or (header_block and not in_headers):
+            if not keep_forwarded:
+                return segments, history_lines + len(lines) - i
+            if forward_start is not None:
+                # replace the outer forward with the one it contains
+                segments.pop()
+                history_lines += i - forward_start
+            forward_start = i
+            segments.append(["Forwarded message:"])
+            in_headers = True
+            in_disclaimer = False
+            if not header_block:
+                continue
+        if in_headers:
+            if header:
+                if header.group(1).lower() in KEPT_HEADERS:
+                    segments[-1].append(line.strip())
+                continue
+            if not line.strip():
+                continue
+            in_headers = False
+        elif REPLY_MARKER.match(line) or QUOTED_LINE.match(line):
+            return segments, history_lines + len(lines) - i
+        if DISCLAIMER.match(line):
+            in_disclaimer = True
+        if in_disclaimer:
+            in_disclaimer = bool(line.strip())
+            continue
+        segments[-1].append(line)
+    return segments, history_lines
+
+
+def preprocess(text, max_tokens=DEFAULT_MAX_TOKENS, tokenizer=None, keep_forwarded=True):
+    """
+    Reduce an email body to what the LLM needs, within a token budget.
+
+    HTML is stripped, the newest message is separated from quoted replies (and, for a
+    forward, the forwarded message is kept without older history), disclaimers and the
+    signature are removed, and the result is cut to max_tokens tokens.
+
+    Parameters:
+    - text (str): Message body.
+    - max_tokens (int, optional): Token budget of the result. Default is 1024; None keeps
+      the whole cleaned text.
+    - tokenizer (optional): Tokenizer of the target model, e.g. load_tokenizer(); without
+      one, token counts are estimated from the length.
+    - keep_forwarded (bool, optional): Keep the forwarded message of a forward. Default is True.
+
+    Returns:
+    - dict: text, tokens_before, tokens_after, tokens_saved, history_lines (removed quoted
+      lines) and truncated.
+    """
+    text = strip_html(text or "").replace("\xa0", " ")
+    segments, history_lines = split_message(text, keep_forwarded)
+    body = "\n".join(line.rstrip() for segment in segments for line in remove_signature(segment))
+    body = re.sub(r"\n{3,}", "\n\n", body).strip()
+    truncated = False
+    if max_tokens is not None:
+        body, truncated = truncate_tokens(body, max_tokens, tokenizer)
+
+    tokens_before = count_tokens(text, tokenizer)
+    tokens_after = count_tokens(body, tokenizer)
+    return {
+        "text": body,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "history_lines": history_lines,
+        "truncated": truncated,
+    }
@@ -0,0 +1,63 @@
+import re
+import json
+import random
+import asyncio
+import argparse
+from aiohttp import web
+
+# field lines of llm_extractor.build_prompt, e.g. - "DATE": The date when ...
+FIELD_PATTERN = re.compile(r'^- "([^"]+)":', re.MULTILINE)
+
+
+def make_app(delay=0.2, fail_rate=0.0, cold_start=0.0, seed=None):
+    """
+    Local stand-in for the Hugging Face inference endpoint, for exercising llm_client.
+
+    Every POST answers [{"generated_text": <JSON object>}] with a placeholder value for
+    each field the prompt asks for, after `delay` seconds. A fraction fail_rate of the
+    requests gets a 503 "Model is currently loading" answer with an estimated_time, and
+    for the first cold_start seconds every request does, like a scaled-to-zero endpoint.
+    """
+    rng = random.Random(seed)
+    app = web.Application()
+    app["stats"] = {"requests": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def generate(request):
+        stats = request.app["stats"]
+        stats["requests"] += 1
+        payload = await request.json()
+        if asyncio.get_running_loop().time() < request.app["ready_at"] or rng.random() < fail_rate:
+            stats["failed"] += 1
+            return web.json_response({"error": "Model is currently loading", "estimated_time": 0.5}, status=503)
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            stats["in_flight"] -= 1
+        fields = FIELD_PATTERN.findall(payload.get("inputs", ""))
+        generated = json.dumps({field: f"stub {field.lower()}" for field in fields})
+        return web.json_response([{"generated_text": generated}])
+
+    async def stats(request):
+        return web.json_response(request.app["stats"])
+
+    async def on_startup(app):
+        app["ready_at"] = asyncio.get_running_loop().time() + cold_start
+
+    app.on_startup.append(on_startup)
+    app.router.add_post("/", generate)
+    app.router.add_post("/models/{model:.*}", generate)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub text-generation endpoint for llm_client.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds per generation")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of 503 answers")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="seconds of 503 answers after start")
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay, args.fail_rate, args.cold_start), port=args.port)
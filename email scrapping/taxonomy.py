@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import copy
+import json
+import math
+import time
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "table.json")
+
+# schema fields of llm_extractor.JSON_SCHEMA and the table.json section they take values from;
+# SERVICE is a free description of the service, not a table entry
+FIELD_SECTIONS = {
+    "TYPE": "types",
+    "UNIT": "units",
+    "DEPARTMENT": "depts",
+    "CAMPAIGN": "campaigns",
+}
+# extra entry fields shown next to the name in candidate lists
+DETAIL_FIELDS = ["type", "proactivity"]
+
+# sections with at most this many entries are listed in full instead of matched
+FULL_LIST_MAX = 50
+# an answer is only mapped to a table name that scores min_score and beats the runner-up by min_margin
+MIN_SCORE = 0.6
+MIN_MARGIN = 0.15
+# candidates of larger sections are the entries matching a phrase of up to
+# PHRASE_MAX_WORDS words with at least HINT_MIN_SCORE, looked for in the subject and the
+# first paragraph with at least FOCUS_MIN_WORDS words (skipping greetings and form labels)
+PHRASE_MAX_WORDS = 4
+HINT_MIN_SCORE = 0.8
+FOCUS_MIN_WORDS = 8
+FOCUS_MAX_CHARS = 500
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+SUBJECT_LINE = re.compile(r"^\s*Subject:\s*(.*)$", re.IGNORECASE | re.MULTILINE)
+HEADER_LINE = re.compile(r"^\s*(?:Forwarded message:|(?:From|Sent|Date|To|Cc|Subject):)", re.IGNORECASE)
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def trigrams(text):
+    """Character trigrams of the lowercased words of text, padded at word boundaries."""
+    words = NON_ALNUM.sub(" ", text.lower()).split()
+    grams = {}
+    for word in words:
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            gram = padded[i:i + 3]
+            grams[gram] = grams.get(gram, 0) + 1
+    return grams
+
+
+class TaxonomyIndex:
+    """
+    Character-trigram TF-IDF index over the named entries of table.json.
+
+    Each section (types, units, campaigns, depts, complexity, status) gets unit-length
+    TF-IDF vectors of its entry names and an inverted index from trigram to entries, so a
+    query only touches the entries sharing a trigram with it. Misspellings and variants
+    such as "Issues Response" still find "Issue Response". The table is reloaded when its
+    modification time changes, checked at most every check_interval seconds.
+
+    Parameters:
+    - path (str, optional): Taxonomy file. Default is table.json next to this module.
+    - check_interval (float, optional): Seconds between modification checks. Default is 1.
+    """
+
+    def __init__(self, path=TAXONOMY_PATH, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.mtime = None
+        self.checked = 0.0
+        self.sections = {}
+        self.reload()
+
+    def reload(self):
+        """Read the table and rebuild the vectors of every section."""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as file:
+            table = json.load(file)
+        sections = {}
+        for section, entries in table.items():
+            entries = [entry for entry in entries if isinstance(entry, dict) and entry.get("name")]
+            if entries:
+                sections[section] = self._build(entries)
+        self.sections = sections
+        self.mtime = mtime
+        self.checked = time.monotonic()
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        if os.stat(self.path).st_mtime_ns != self.mtime:
+            self.reload()
+
+    def identity(self):
+        """Path and modification time of the loaded table, e.g. for cache keys."""
+        self._maybe_reload()
+        return f"{self.path}@{self.mtime}"
+
+    @staticmethod
+    def _build(entries):
+        counts = [trigrams(entry["name"]) for entry in entries]
+        document_frequency = {}
+        for grams in counts:
+            for gram in grams:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+        idf = {gram: math.log((1 + len(entries)) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        postings = {}
+        for i, grams in enumerate(counts):
+            weights = {gram: count * idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for gram, weight in weights.items():
+                postings.setdefault(gram, []).append((i, weight / norm))
+        return {"entries": entries, "idf": idf, "postings": postings}
+
+    def match(self, text, section="types", k=5):
+        """
+        Best entries of a section for text, by cosine similarity of trigram TF-IDF vectors.
+
+        Returns:
+        - list: Up to k (score, entry) pairs, best first; entries sharing no trigram are left out.
+        """
+        self._maybe_reload()
+        index = self.sections[section]
+        idf = index["idf"]
+        query = {gram: count * idf[gram] for gram, count in trigrams(text or "").items() if gram in idf}
+        norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        if not norm:
+            return []
+        scores = {}
+        for gram, weight in query.items():
+            for i, entry_weight in index["postings"][gram]:
+                scores[i] = scores.get(i, 0.0) + weight * entry_weight
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(score / norm, index["entries"][i]) for i, score in best]
+
+    def match_phrases(self, text, section="types", k=5, min_score=HINT_MIN_SCORE, max_words=PHRASE_MAX_WORDS):
+        """
+        Entries of a section named by a phrase of text: every run of up to max_words words
+        is matched and each entry keeps its best score, so a name mentioned in a long
+        text is found without the rest of the text diluting it.
+
+        Returns:
+        - list: Up to k (score, entry) pairs scoring at least min_score, best first.
+        """
+        words = NON_ALNUM.sub(" ", (text or "").lower()).split()
+        scores = {}
+        for size in range(1, max_words + 1):
+            for i in range(len(words) - size + 1):
+                for score, entry in self.match(" ".join(words[i:i + size]), section, k):
+                    if score >= min_score and score > scores.get(id(entry), (0.0, None))[0]:
+                        scores[id(entry)] = (score, entry)
+        return sorted(scores.values(), key=lambda item: -item[0])[:k]
+
+    def best(self, text, section="types", min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+        """
+        Name of the best entry of a section, or None unless it scores at least min_score
+        and beats the runner-up by min_margin.
+        """
+        matches = self.match(text, section, k=2)
+        if not matches or matches[0][0] < min_score:
+            return None
+        if len(matches) > 1 and matches[0][0] - matches[1][0] < min_margin:
+            return None
+        return matches[0][1]["name"].strip()
+
+    def candidates(self, text, section="types", k=5):
+        """
+        Short candidate list for a prompt, e.g. '- Media Release (Tactic, Proactive)':
+        up to k entries named in text (see match_phrases), or every entry of the section
+        when k is None.
+        """
+        self._maybe_reload()
+        if k is None:
+            entries = self.sections[section]["entries"]
+        else:
+            entries = [entry for _, entry in self.match_phrases(text, section, k)]
+        lines = []
+        for entry in entries:
+            details = [str(entry[field]) for field in DETAIL_FIELDS if entry.get(field)]
+            lines.append(f"- {entry['name'].strip()}" + (f" ({', '.join(details)})" if details else ""))
+        return "\n".join(lines)
+
+
+def focus_text(text, subject=None):
+    """
+    Subject and first paragraph of an email, the part that says what it is about. The
+    subject is read from a Subject: line when not given; header blocks and paragraphs
+    shorter than FOCUS_MIN_WORDS words (greetings, form labels) are skipped.
+    """
+    if subject is None:
+        match = SUBJECT_LINE.search(text)
+        subject = match.group(1) if match else ""
+    first = ""
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        lines = [line for line in paragraph.splitlines() if line.strip() and not HEADER_LINE.match(line)]
+        if len(" ".join(lines).split()) >= FOCUS_MIN_WORDS:
+            first = " ".join(lines)
+            break
+    return f"{subject}\n{first[:FOCUS_MAX_CHARS]}".strip()
+
+
+def constrain_schema(schema, text, index, k=5, subject=None):
+    """
+    Copy of an extraction schema whose taxonomy fields show known table.json values as a
+    hint: every entry of sections with at most FULL_LIST_MAX entries, and for larger ones
+    up to k entries named in the subject or first paragraph of text (none if nothing
+    clearly matches). The model may still answer with a value that is not listed.
+    """
+    schema = copy.deepcopy(schema)
+    focus = focus_text(text, subject)
+    for field, section in FIELD_SECTIONS.items():
+        if field in schema["properties"] and section in index.sections:
+            full = len(index.sections[section]["entries"]) <= FULL_LIST_MAX
+            candidates = index.candidates(focus, section, None if full else k)
+            if candidates:
+                hint = "Known values" if full else "Possibly related known values"
+                schema["properties"][field]["description"] += \
+                    f" {hint} (a hint; answer with another value if none fits):\n{candidates}"
+    return schema
+
+
+def normalize_extraction(extraction, index, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    """
+    Map the free-text taxonomy fields of an extraction to table.json names where one
+    clearly matches (see TaxonomyIndex.best); other answers are kept as the model gave them.
+    """
+    normalized = dict(extraction)
+    for field, section in FIELD_SECTIONS.items():
+        value = normalized.get(field)
+        if value and value != "None" and section in index.sections:
+            normalized[field] = index.best(value, section, min_score, min_margin) or value
+    return normalized
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python taxonomy.py <text> [section]")
+    else:
+        section = sys.argv[2] if len(sys.argv) > 2 else "types"
+        for score, entry in TaxonomyIndex().match(sys.argv[1], section):
+            print(f"{score:.3f}  {entry['name']}")
@@ -0,0 +1,21 @@
+def top_k_per_group(counts, k=1):
+    """
+    Return the k largest items of every group from a sparse count Series.
+
+    Only the observed (group, item) pairs are sorted, so memory is linear in the
+    number of pairs instead of groups x items as with unstack.
+
+    Parameters:
+    - counts (Series): Counts indexed by a two-level (group, item) MultiIndex,
+      e.g. data.groupby(["client_ip", "endpoint_cleaned"]).size().
+    - k (int, optional): Number of items kept per group. Default is 1.
+
+    Returns:
+    - DataFrame: Columns group, item and count, with groups in ascending order and at
+      most k rows per group by descending count. Ties go to the smallest item, as with
+      idxmax over an unstacked frame.
+    """
+    group, item = counts.index.names
+    frame = counts.rename("count").reset_index()
+    frame = frame.sort_values([group, "count", item], ascending=[True, False, True], kind="mergesort")
+    return frame.groupby(group, sort=False).head(k).reset_index(drop=True)
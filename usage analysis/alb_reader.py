@@ -0,0 +1,102 @@
+import os
+import sys
+import glob
+import pandas as pd
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from compact import compact_logs
+
+# leading fields of an AWS Application Load Balancer access log entry
+ALB_FIELDS = [
+    "type", "time", "elb", "client", "target",
+    "request_processing_time", "target_processing_time", "response_processing_time",
+    "elb_status_code", "target_status_code", "received_bytes", "sent_bytes",
+    "request", "user_agent",
+]
+
+PROCESSING_COLUMNS = ["request_processing_time", "target_processing_time", "response_processing_time"]
+BYTES_COLUMNS = ["received_bytes", "sent_bytes"]
+
+# columns of the frame the usage-analysis functions expect, in the CSV export order
+OUTPUT_COLUMNS = [
+    "time", "client_ip", "request_verb", "request_url",
+    "request_processing_time", "target_processing_time", "response_processing_time",
+    "elb_status_code", "target_status_code", "received_bytes", "sent_bytes", "user_agent",
+]
+
+
+def is_alb_log(path):
+    """Return True for raw ALB log files (.log or .log.gz)."""
+    return path.endswith(".log.gz") or path.endswith(".log")
+
+
+def read_alb_log(path, compact=False):
+    """
+    Read one raw ALB access log (.log or .log.gz) into the frame the task functions expect.
+
+    The space-delimited entries are parsed by the pandas C reader. The quoted
+    "VERB URL PROTOCOL" field is split into request_verb and request_url, and the
+    "ip:port" client field into client_ip. Fields added to the log format after
+    user_agent are ignored. With compact=True the frame uses the compact schema of
+    compact.compact_logs.
+    """
+    logs = pd.read_csv(path, sep=" ", header=None, quotechar='"', usecols=range(len(ALB_FIELDS)),
+                       dtype=str, compression="infer", keep_default_na=False)
+    logs.columns = ALB_FIELDS
+
+    request = logs["request"].str.split(" ", n=2, expand=True).reindex(columns=[0, 1])
+    logs["request_verb"] = request[0]
+    logs["request_url"] = request[1]
+    logs["client_ip"] = logs["client"].str.rsplit(":", n=1).str[0]
+    logs["time"] = pd.to_datetime(logs["time"])
+    for column in PROCESSING_COLUMNS:
+        logs[column] = pd.to_numeric(logs[column], errors="coerce")
+    for column in BYTES_COLUMNS:
+        logs[column] = pd.to_numeric(logs[column], errors="coerce").astype("Int64")
+    logs = logs[OUTPUT_COLUMNS]
+    return compact_logs(logs) if compact else logs
+
+
+def list_alb_logs(source):
+    """Return the ALB log files of a directory (searched recursively), or the path itself."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "**", "*.log.gz"), recursive=True)
+                      + glob.glob(os.path.join(source, "**", "*.log"), recursive=True))
+    return [source]
+
+
+def read_alb_logs(sources, workers=None, compact=False):
+    """
+    Read many raw ALB log files, decompressing and parsing them in a process pool.
+
+    Parameters:
+    - sources (str or list): Log files and/or directories of log files.
+    - workers (int, optional): Number of processes. Default is the number of cores;
+      1 reads the files in this process.
+    - compact (bool, optional): If True, return the compact schema. Default is False.
+
+    Returns:
+    - DataFrame: The logs of all files, in file order.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = [path for source in sources for path in list_alb_logs(source)]
+    if not paths:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        frames = [read_alb_log(path, compact) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(partial(read_alb_log, compact=compact), paths))
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python alb_reader.py <log_dir_or_file> <output_csv> [workers]")
+    else:
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        read_alb_logs(sys.argv[1], workers).to_csv(sys.argv[2], index=False)
+        print("Successfully save ALB logs as csv")
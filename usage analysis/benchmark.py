@@ -0,0 +1,141 @@
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tempfile
+import tracemalloc
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from synthetic import generate_logs
+from logframe import LogFrame
+from ingest import count_ip_requests
+from task3 import get_api_request
+from task4 import get_highest_traffic_endpoint_per_ip
+from task5 import count_parameter_values_for_endpoint
+from task6 import get_avg_processing_time
+from task7_method import (search_section_view, search_category_view, search_query_view,
+                          search_query_view_split, search_time_series)
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+# benchmarked public functions, each called on the raw DataFrame (which includes parsing)
+BENCHMARKS = {
+    "LogFrame": lambda data, csv_path: LogFrame(data),
+    "analyze_requests (chunked)": lambda data, csv_path: count_ip_requests(csv_path, "fuzzySearch"),
+    "get_api_request": lambda data, csv_path: get_api_request(data),
+    "get_highest_traffic_endpoint_per_ip": lambda data, csv_path: get_highest_traffic_endpoint_per_ip(data),
+    "count_parameter_values_for_endpoint":
+        lambda data, csv_path: count_parameter_values_for_endpoint(data, "/issues/fuzzySearch", "category"),
+    "get_avg_processing_time": lambda data, csv_path: get_avg_processing_time(data, percentiles=(50, 95, 99)),
+    "search_section_view": lambda data, csv_path: search_section_view(data),
+    "search_category_view": lambda data, csv_path: search_category_view(data, section_split=True),
+    "search_query_view": lambda data, csv_path: search_query_view(data),
+    "search_query_view_split": lambda data, csv_path: search_query_view_split(data),
+    "search_time_series": lambda data, csv_path: search_time_series(data, section_split=True),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(func, data, csv_path, repeat):
+    """Return the best wall time of `repeat` calls and the peak traced memory of one call."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(data, csv_path)
+        timings.append(time.perf_counter() - start)
+        plt.close("all")
+
+    gc.collect()
+    tracemalloc.start()
+    func(data, csv_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    plt.close("all")
+    return min(timings), peak / 2 ** 20
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, repeat=3, seed=0):
+    """
+    Time and memory-profile the usage-analysis functions on synthetic logs.
+
+    Parameters:
+    - sizes (list, optional): Numbers of rows. Default is 10k, 1M and 10M.
+    - names (list, optional): Benchmarks to run. Default is all of BENCHMARKS.
+    - repeat (int, optional): Timed calls per benchmark, the best is kept. Default is 3.
+    - seed (int, optional): Seed of the synthetic logs. Default is 0.
+
+    Returns:
+    - dict: Machine-readable results with the commit, environment and one record per
+      (function, rows) with seconds and peak_mb.
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    for rows in sizes:
+        data = generate_logs(rows, seed=seed)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, "logs.csv")
+            data.to_csv(csv_path, index=False)
+            for name in names:
+                seconds, peak_mb = measure(BENCHMARKS[name], data, csv_path, repeat)
+                results.append({"function": name, "rows": rows, "seconds": round(seconds, 6), "peak_mb": round(peak_mb, 3)})
+                print(f"{name:40s} {rows:>10d} rows {seconds:10.3f} s {peak_mb:10.1f} MB")
+    return {
+        "commit": git_commit(),
+        "created": pd.Timestamp.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(old_path, new_path):
+    """Return the per-benchmark time and memory ratios (new / old) of two result files."""
+    with open(old_path) as f:
+        old = pd.DataFrame(json.load(f)["results"])
+    with open(new_path) as f:
+        new = pd.DataFrame(json.load(f)["results"])
+    merged = old.merge(new, on=["function", "rows"], suffixes=("_old", "_new"))
+    merged["time_ratio"] = merged["seconds_new"] / merged["seconds_old"]
+    merged["memory_ratio"] = merged["peak_mb_new"] / merged["peak_mb_old"]
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the usage-analysis functions on synthetic logs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file (default benchmarks/results-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        pd.set_option("display.width", 200)
+        print(compare(*args.compare).round(3).to_string(index=False))
+        sys.exit(0)
+
+    report = run_benchmarks(args.sizes, args.only, args.repeat, args.seed)
+    output = args.output or os.path.join(RESULTS_DIR, f"results-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Successfully save benchmark results as {output}")
@@ -0,0 +1,104 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# low-cardinality text columns stored as pandas categoricals
+CATEGORY_COLUMNS = ["request_verb", "section", "category", "action", "elb_status_code",
+                    "target_status_code", "user_agent"]
+# high-cardinality URL columns stored as Arrow-backed strings
+STRING_COLUMNS = ["request_url", "base", "path", "query", "queryString"]
+
+IPV4_PATTERN = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
+
+
+def string_dtype():
+    """Arrow-backed string dtype when pyarrow is installed, else categorical."""
+    try:
+        import pyarrow  # noqa: F401
+        return "string[pyarrow]"
+    except ImportError:
+        return "category"
+
+
+def ip_to_uint32(ips):
+    """
+    Pack IPv4 addresses into uint32, converting each distinct address once.
+    Returns None if any value is missing or not an IPv4 address (e.g. IPv6).
+    """
+    codes, uniques = pd.factorize(ips)
+    uniques = pd.Series(uniques, dtype=object)
+    if not uniques.str.match(IPV4_PATTERN).all() or (codes == -1).any():
+        return None
+    octets = uniques.str.split(".", expand=True).astype(np.uint32).to_numpy()
+    if (octets > 255).any():
+        return None
+    packed = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    return pd.Series(packed[codes].astype(np.uint32), index=ips.index, name=ips.name)
+
+
+def uint32_to_ip(packed):
+    """Unpack uint32 addresses back into dotted IPv4 strings."""
+    values = packed.to_numpy(dtype=np.uint32)
+    octets = [((values >> shift) & 0xFF).astype(str) for shift in (24, 16, 8, 0)]
+    ips = octets[0]
+    for octet in octets[1:]:
+        ips = np.char.add(np.char.add(ips, "."), octet)
+    return pd.Series(ips.astype(object), index=packed.index, name=packed.name)
+
+
+def decode_ips(frame, column="client_ip"):
+    """Return frame with a uint32-packed ip column turned back into dotted strings."""
+    if column in frame.columns and frame[column].dtype == np.uint32:
+        frame = frame.copy()
+        frame[column] = uint32_to_ip(frame[column])
+    return frame
+
+
+def compact_logs(data):
+    """
+    Return a compact copy of log data: categorical verbs, sections, categories and
+    status codes, IPv4 client_ip packed into uint32, Arrow-backed URL strings and a
+    datetime time column. Columns that are absent are skipped.
+    """
+    compact = data.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in compact.columns:
+            compact[column] = compact[column].astype("category")
+    url_dtype = string_dtype()
+    for column in STRING_COLUMNS:
+        if column in compact.columns:
+            compact[column] = compact[column].astype(url_dtype)
+    if "client_ip" in compact.columns and compact["client_ip"].dtype == object:
+        packed = ip_to_uint32(compact["client_ip"])
+        compact["client_ip"] = packed if packed is not None else compact["client_ip"].astype("category")
+    if "time" in compact.columns and not pd.api.types.is_datetime64_any_dtype(compact["time"]):
+        compact["time"] = pd.to_datetime(compact["time"])
+    return compact
+
+
+def memory_report(before, after):
+    """
+    Compare the memory footprint of two frames column by column (deep, in MB).
+
+    Returns:
+    - DataFrame: before_mb, after_mb, ratio and dtype per column, with a total row.
+    """
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False).reindex(before_bytes.index)
+    report = pd.DataFrame({
+        "before_mb": before_bytes / 2 ** 20,
+        "after_mb": after_bytes / 2 ** 20,
+        "dtype": after.dtypes.reindex(before_bytes.index).astype(str),
+    })
+    report.loc["total"] = [report["before_mb"].sum(), report["after_mb"].sum(), ""]
+    report["ratio"] = report["before_mb"] / report["after_mb"]
+    return report
+
+
+if __name__ == "__main__":
+    from synthetic import generate_logs
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    logs = generate_logs(rows, days=30)
+    print(f"Memory of a synthetic month of {rows} requests")
+    print(memory_report(logs, compact_logs(logs)).round(2))
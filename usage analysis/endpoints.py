@@ -0,0 +1,52 @@
+import re
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+UUID_PATTERN = re.compile(r'/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)')
+# numeric ids and 24-character hex (MongoDB ObjectId) ids
+ID_PATTERN = re.compile(r'/(?:\d+|[0-9a-fA-F]{24})(?=/|$)')
+PERCENT_ENCODED_PATTERN = re.compile(r'/[^/]*%[0-9a-fA-F]{2}[^/]*(?=/|$)')
+
+
+def clean_endpoint(endpoint):
+    """Collapse numeric and ObjectId path segments, e.g. /issues/42 -> /issues/{id}."""
+    endpoint = endpoint.rstrip('/') or '/'
+    return ID_PATTERN.sub('/{id}', endpoint)
+
+
+def clean_UUID(endpoint):
+    """Collapse UUID path segments, e.g. /users/1b4e28ba-2fa1-11d2-883f-0016d3cca427 -> /users/{id}."""
+    return UUID_PATTERN.sub('/{id}', endpoint)
+
+
+def clean_percent_encoded_path(endpoint):
+    """Collapse percent-encoded path segments (names, search terms), e.g. /experts/Jane%20Doe -> /experts/{value}."""
+    return PERCENT_ENCODED_PATTERN.sub('/{value}', endpoint)
+
+
+@lru_cache(maxsize=65536)
+def template_endpoint(endpoint):
+    """Return the route template of one api path."""
+    return clean_percent_encoded_path(clean_UUID(clean_endpoint(endpoint)))
+
+
+def template_endpoints(endpoints):
+    """
+    Return the route templates of a Series of api paths.
+
+    Each distinct path is templated once and the result is broadcast back to the rows
+    through the factorized codes, so the cost depends on the number of unique paths
+    rather than the number of rows.
+
+    Parameters:
+    - endpoints (Series): Api paths without base path and query string.
+
+    Returns:
+    - Series: Route templates aligned with the input (NaN where the input is NaN).
+    """
+    codes, uniques = pd.factorize(endpoints)
+    templates = np.empty(len(uniques) + 1, dtype=object)
+    templates[:-1] = [template_endpoint(endpoint) for endpoint in uniques]
+    templates[-1] = np.nan
+    return pd.Series(templates[codes], index=endpoints.index, name=endpoints.name)
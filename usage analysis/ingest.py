@@ -0,0 +1,114 @@
+import pandas as pd
+from logframe import LogFrame
+from compact import compact_logs
+from sketches import SpaceSaving, CountMinSketch, HyperLogLog
+
+# default number of rows read per chunk in streaming mode
+CHUNKSIZE = 500_000
+
+# dtypes of the access log columns used by the usage-analysis functions
+LOG_DTYPES = {
+    "time": "object",
+    "client_ip": "object",
+    "request_verb": "object",
+    "request_url": "object",
+    "request_processing_time": "float64",
+    "target_processing_time": "float64",
+    "response_processing_time": "float64",
+}
+
+
+def iter_log_chunks(file_path, columns=None, chunksize=CHUNKSIZE, compact=False):
+    """
+    Read a log export in chunks, keeping only the requested columns.
+
+    Parameters:
+    - file_path (str): Path of the CSV log export.
+    - columns (list, optional): Columns to read. Default is every column in LOG_DTYPES.
+    - chunksize (int, optional): Number of rows per chunk.
+    - compact (bool, optional): If True, yield chunks in the compact schema of
+      compact.compact_logs. Default is False.
+
+    Yields:
+    - DataFrame: One chunk of at most chunksize rows.
+    """
+    if columns is None:
+        columns = list(LOG_DTYPES)
+    dtype = {column: LOG_DTYPES[column] for column in columns if column in LOG_DTYPES}
+    for chunk in pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize):
+        yield compact_logs(chunk) if compact else chunk
+
+
+def merge_counts(total, partial):
+    """Add a partial count Series into a running total (None for an empty total)."""
+    if total is None:
+        return partial
+    return total.add(partial, fill_value=0)
+
+
+def finish_counts(total, index_names, name="count"):
+    """Turn a merged count Series into the frame the all-in-memory groupby produces."""
+    if total is None:
+        index = pd.MultiIndex.from_tuples([], names=index_names) if len(index_names) > 1 \
+            else pd.Index([], name=index_names[0])
+        total = pd.Series([], index=index, dtype="int64")
+    return total.sort_index().astype("int64").reset_index(name=name)
+
+
+def count_ip_requests(file_path, search_keyword, chunksize=CHUNKSIZE):
+    """
+    Streaming version of the ip counts in task2.analyze_requests: count the requests per
+    client_ip whose request_url contains search_keyword, reading only two columns and
+    keeping one partial count per chunk.
+    """
+    total = None
+    for chunk in iter_log_chunks(file_path, ["client_ip", "request_url"], chunksize):
+        filtered = chunk[chunk["request_url"].str.contains(search_keyword, na=False)]
+        total = merge_counts(total, filtered.groupby("client_ip").size())
+    return finish_counts(total, ["client_ip"])
+
+
+def approx_ip_counts(file_path, search_keyword, top=20, chunksize=CHUNKSIZE):
+    """
+    Approximate version of count_ip_requests for very many client ips: keep the top
+    ips in a SpaceSaving summary refined by a Count-Min sketch and estimate the number
+    of distinct ips with a HyperLogLog, all in fixed memory.
+
+    Returns:
+    - tuple: (DataFrame of the top client_ip and estimated count, estimated distinct ips)
+    """
+    heavy_hitters = SpaceSaving(50 * top)
+    count_min = CountMinSketch()
+    distinct_ips = HyperLogLog()
+    for chunk in iter_log_chunks(file_path, ["client_ip", "request_url"], chunksize):
+        ips = chunk.loc[chunk["request_url"].str.contains(search_keyword, na=False), "client_ip"]
+        heavy_hitters.update(ips)
+        count_min.update(ips)
+        distinct_ips.update(ips)
+    ip_counts = heavy_hitters.top(top, count_min).rename_axis("client_ip").reset_index(name="count")
+    return ip_counts, distinct_ips.count()
+
+
+def count_api_requests(file_path, chunksize=CHUNKSIZE):
+    """
+    Streaming version of task3.get_api_request: count the api requests per
+    (request_verb, path), merging the counts of each chunk.
+    """
+    total = None
+    for chunk in iter_log_chunks(file_path, ["request_verb", "request_url"], chunksize):
+        api = LogFrame(chunk).api
+        total = merge_counts(total, api.groupby(["request_verb", "path"]).size())
+    api_data = finish_counts(total, ["request_verb", "path"])
+    return api_data.sort_values(by="count", ascending=False)
+
+
+def count_endpoint_ip_requests(file_path, chunksize=CHUNKSIZE):
+    """
+    Count the api requests per (client_ip, path) chunk by chunk. The result is the
+    sparse input of the highest-traffic-endpoint-per-ip analysis in task4.
+    """
+    total = None
+    for chunk in iter_log_chunks(file_path, ["client_ip", "request_url"], chunksize):
+        api = LogFrame(chunk).api
+        total = merge_counts(total, api.groupby(["client_ip", "path"]).size())
+    return finish_counts(total, ["client_ip", "path"])
@@ -0,0 +1,214 @@
+import io
+import os
+import sys
+import glob
+import time
+import pandas as pd
+from logframe import LogFrame
+from alb_reader import is_alb_log, read_alb_log
+from aggregate import top_k_per_group
+from compact import decode_ips
+from ingest import merge_counts, finish_counts
+from sketches import LatencySketch
+
+LATENCY_COLUMNS = ["request_verb", "path"]
+
+
+class LiveAggregates:
+    """
+    Running versions of the task3/task4/task6/task7_method aggregates.
+
+    update() aggregates only the new rows and folds the partial counts and latency
+    sketch into the running totals, so its cost depends on the new data and the number
+    of distinct keys, never on the number of rows seen before. The snapshot methods
+    read the totals only and return the output format of the matching task function.
+    follow() keeps its LogTailer in tailer, so a later follow() with these aggregates
+    resumes at the file offsets it reached.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.tailer = None
+        self.rows = 0
+        self.api_counts = None
+        self.endpoint_ip_counts = None
+        self.search_counts = None
+        self.latency = LatencySketch(LATENCY_COLUMNS, relative_accuracy)
+        self.last_time = None
+
+    def update(self, data):
+        """Add new log rows (DataFrame or LogFrame) to the aggregates."""
+        log = data if isinstance(data, LogFrame) else LogFrame(data)
+        api = log.api
+        self.rows += len(log.data)
+        if len(log.data) == 0:
+            return self
+
+        self.api_counts = merge_counts(self.api_counts, api.groupby(["request_verb", "path"], observed=True).size())
+        # keyed by dotted ip strings so the top endpoints rank like task4 on plain logs
+        pairs = decode_ips(pd.DataFrame({"client_ip": api["client_ip"], "endpoint_cleaned": log.endpoint}))
+        self.endpoint_ip_counts = merge_counts(self.endpoint_ip_counts,
+                                               pairs.groupby(["client_ip", "endpoint_cleaned"], observed=True).size())
+        # most polls carry no fuzzySearch rows at all
+        search = log.search
+        if len(search):
+            self.search_counts = merge_counts(self.search_counts,
+                                              search.groupby(["section", "category"], observed=True).size())
+        if "processing_time" in api.columns:
+            self.latency.update(api[LATENCY_COLUMNS + ["processing_time"]], "processing_time")
+        self.last_time = log.data["time"].max()
+        return self
+
+    # snapshots
+
+    def api_requests(self, pivot=False):
+        """Current counts per verb and path, like task3.get_api_request."""
+        api_data = finish_counts(self.api_counts, ["request_verb", "path"]).sort_values(by="count", ascending=False)
+        if pivot:
+            return api_data.pivot_table(index="path", columns="request_verb", values="count", fill_value=0, observed=True)
+        return api_data
+
+    def highest_traffic_endpoint_per_ip(self, k=1):
+        """Current top endpoints per client ip, like task4.get_highest_traffic_endpoint_per_ip."""
+        if self.endpoint_ip_counts is None:
+            return pd.DataFrame(columns=["client_ip", "max_requests", "max_endpoint"])
+        counts = self.endpoint_ip_counts.astype("int64").sort_index()
+        top_endpoints = top_k_per_group(counts, k).rename(columns={"count": "max_requests", "endpoint_cleaned": "max_endpoint"})
+        return top_endpoints[["client_ip", "max_requests", "max_endpoint"]]
+
+    def search_category_counts(self, section_split=False):
+        """
+        Current fuzzySearch counts per category, like task7_method.search_category_view;
+        with section_split, per (section, category).
+        """
+        if self.search_counts is None:
+            return pd.Series([], dtype="int64", name="count")
+        counts = self.search_counts.astype("int64")
+        if section_split:
+            return counts.sort_index().rename("count")
+        return counts.groupby(level="category").sum().sort_values(ascending=False).rename("count")
+
+    def avg_processing_time(self, percentiles=None):
+        """Current mean, variance and percentiles per verb and path, like task6.get_avg_processing_time."""
+        if self.latency.moments is None:
+            columns = ["Average Processing Time", "Variance"] + [f"p{p:g}" for p in percentiles or []]
+            return pd.DataFrame(columns=LATENCY_COLUMNS + columns)
+        result = self.latency.summary().sort_values(LATENCY_COLUMNS).reset_index(drop=True)
+        result = result.drop(columns="count").rename(columns={"mean": "Average Processing Time", "var": "Variance"})
+        if percentiles:
+            result = result.merge(self.latency.quantiles([p / 100 for p in percentiles]), on=LATENCY_COLUMNS, how="left")
+        return result
+
+    def slow_endpoints(self, percentile=95, n=10):
+        """The n verb/path pairs with the highest estimated latency percentile."""
+        column = f"p{percentile:g}"
+        return self.latency.quantiles([percentile / 100]).sort_values(column, ascending=False).head(n)
+
+
+class LogTailer:
+    """
+    Follow a directory of CSV exports and/or raw ALB logs, returning only new rows.
+
+    Plain CSV and .log files are read from the byte offset reached by the previous
+    poll up to their last complete line, so lines still being written are picked up
+    on the next poll. A file that shrank was rotated and is read again from the start.
+    Gzipped ALB logs are delivered as complete files and are read once when they appear.
+    """
+
+    def __init__(self, directory, pattern="*"):
+        self.directory = directory
+        self.pattern = pattern
+        self.offsets = {}
+        self.headers = {}
+
+    def _files(self):
+        paths = glob.glob(os.path.join(self.directory, "**", self.pattern), recursive=True)
+        return sorted(path for path in paths if path.endswith(".csv") or is_alb_log(path))
+
+    def _read_new_lines(self, path):
+        offset = self.offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            offset = 0
+            self.headers.pop(path, None)
+        with open(path, "rb") as file:
+            file.seek(offset)
+            new = file.read()
+        complete = new[:new.rfind(b"\n") + 1]
+        self.offsets[path] = offset + len(complete)
+        return complete
+
+    def _read_file(self, path):
+        if path.endswith(".gz"):
+            if path in self.offsets:
+                return None
+            self.offsets[path] = os.path.getsize(path)
+            return read_alb_log(path)
+
+        lines = self._read_new_lines(path)
+        if not lines:
+            return None
+        if is_alb_log(path):
+            return read_alb_log(io.BytesIO(lines))
+        # the CSV header is only in the first read, later reads are parsed with it
+        if path not in self.headers:
+            header, _, lines = lines.partition(b"\n")
+            self.headers[path] = header + b"\n"
+            if not lines:
+                return None
+        return pd.read_csv(io.BytesIO(self.headers[path] + lines))
+
+    def poll(self):
+        """Return the rows that arrived since the last poll (None if there are none)."""
+        frames = [frame for frame in map(self._read_file, self._files()) if frame is not None and len(frame)]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+
+def follow(directory, interval=5.0, callback=None, aggregates=None, polls=None):
+    """
+    Watch a log directory and keep LiveAggregates up to date.
+
+    Parameters:
+    - directory (str): Directory of CSV exports and/or ALB logs.
+    - interval (float, optional): Seconds between polls. Default is 5.
+    - callback (callable, optional): Called with the aggregates after each update.
+    - aggregates (LiveAggregates, optional): Aggregates to continue from; files already
+      read into them by an earlier follow() of the same directory are not read again.
+    - polls (int, optional): Stop after this many polls. Default is to run until interrupted.
+
+    Returns:
+    - LiveAggregates: The aggregates when following stops.
+    """
+    aggregates = aggregates or LiveAggregates()
+    if aggregates.tailer is None or aggregates.tailer.directory != directory:
+        aggregates.tailer = LogTailer(directory)
+    tailer = aggregates.tailer
+    count = 0
+    while polls is None or count < polls:
+        new_rows = tailer.poll()
+        if new_rows is not None:
+            aggregates.update(new_rows)
+            if callback is not None:
+                callback(aggregates)
+        count += 1
+        if polls is None or count < polls:
+            time.sleep(interval)
+    return aggregates
+
+
+def print_snapshot(aggregates, top=10):
+    print(f"\n{aggregates.rows} requests up to {aggregates.last_time}")
+    print(aggregates.api_requests().head(top).to_string(index=False))
+    print(aggregates.search_category_counts().head(top).to_string())
+    print(aggregates.slow_endpoints(95, top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python live.py <log_dir> [interval_seconds]")
+    else:
+        interval = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+        try:
+            follow(sys.argv[1], interval, print_snapshot)
+        except KeyboardInterrupt:
+            pass
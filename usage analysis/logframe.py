@@ -0,0 +1,107 @@
+import pandas as pd
+import numpy as np
+from functools import cached_property
+from urllib.parse import parse_qs
+
+# columns derived from request_url / processing times by LogFrame
+PARSED_COLUMNS = ["is_api", "base", "path", "query", "processing_time"]
+
+IP_HOST_PATTERN = r'https://\d+\.\d+\.\d+\.\d+(?::\d+)?/'
+
+
+class LogFrame:
+    """
+    Access log data parsed once and shared by every usage-analysis function.
+
+    The URL of each request is split into its base, api path and query string a
+    single time, and the total processing time is summed a single time. Every task
+    function accepts either a raw DataFrame or a LogFrame, so building the LogFrame
+    up front and passing it around makes a full dashboard refresh cost one parse.
+
+    Parameters:
+    - data (DataFrame): Raw request data containing at least a request_url column.
+      Frames that already carry the parsed is_api and path columns (for example
+      loaded from logstore) are used as they are.
+    """
+
+    def __init__(self, data):
+        if "is_api" in data.columns and "path" in data.columns:
+            self.data = data
+        else:
+            self.data = parse_request_url(data)
+
+    def __len__(self):
+        return len(self.data)
+
+    @cached_property
+    def api(self):
+        """Rows whose request_url contains "api", with the parsed path and query."""
+        return self.data[self.data["is_api"]]
+
+    @cached_property
+    def api_external(self):
+        """API rows excluding requests sent to IP address-based hosts."""
+        api = self.api
+        return api[~api["request_url"].str.contains(IP_HOST_PATTERN, na=False)]
+
+    @cached_property
+    def endpoint(self):
+        """Route template of each API row, e.g. /issues/{id}, see endpoints.template_endpoints."""
+        from endpoints import template_endpoints
+        return template_endpoints(self.api["path"]).rename("endpoint_cleaned")
+
+    @cached_property
+    def params(self):
+        """Parsed query parameters (dict per row) for the API rows."""
+        codes, uniques = pd.factorize(self.api["query"])
+        # parse each distinct query string once, code -1 (no query) picks the trailing {}
+        parsed = np.empty(len(uniques) + 1, dtype=object)
+        parsed[:] = [parse_qs(query) for query in uniques] + [{}]
+        return pd.Series(parsed[codes], index=self.api.index, name="params")
+
+    @cached_property
+    def param_index(self):
+        """Query parameter value counts per endpoint template, see param_index.ParamIndex."""
+        from param_index import ParamIndex
+        return ParamIndex.build(self)
+
+    @cached_property
+    def search(self):
+        """Cleaned fuzzySearch rows, see task7_method.data_search_filter."""
+        from task7_method import data_search_filter
+        raw_columns = [column for column in self.api_external.columns if column not in PARSED_COLUMNS]
+        return data_search_filter(self.api_external[raw_columns])
+
+
+def parse_request_url(data):
+    """
+    Add the parsed URL columns (is_api, base, path, query) and the total
+    processing_time to a copy of the raw data.
+    """
+    parsed = data.copy()
+    url = parsed["request_url"]
+    if isinstance(url.dtype, pd.CategoricalDtype):
+        url = url.astype(object)
+    url = url.fillna("")
+
+    parsed["is_api"] = url.str.contains("api", regex=False)
+    # remove basepath from api, then remove parameters
+    path_with_query = url.str.replace(r'.*/api', '', regex=True)
+    split = path_with_query.str.split('?', n=1, expand=True).reindex(columns=[0, 1])
+    parsed["path"] = split[0]
+    parsed["query"] = split[1]
+    parsed["base"] = url.str.extract(r'(.*)/api', expand=False)
+
+    processing_columns = ["request_processing_time", "target_processing_time", "response_processing_time"]
+    if all(column in parsed.columns for column in processing_columns):
+        parsed["processing_time"] = (parsed["request_processing_time"]
+                                     + parsed["target_processing_time"]
+                                     + parsed["response_processing_time"])
+    return parsed
+
+
+def as_logframe(data):
+    """Return data as a LogFrame, parsing it only if it is a raw DataFrame."""
+    if isinstance(data, LogFrame):
+        return data
+    return LogFrame(data)
@@ -0,0 +1,132 @@
+import os
+import glob
+import json
+import hashlib
+import pandas as pd
+from ingest import iter_log_chunks, CHUNKSIZE
+from logframe import LogFrame
+from alb_reader import is_alb_log, read_alb_log
+from compact import compact_logs
+
+MANIFEST_NAME = "manifest.json"
+
+# columns each task function needs when it is run from the store
+TASK_COLUMNS = {
+    "analyze_requests": ["client_ip", "request_url"],
+    "get_api_request": ["request_verb", "is_api", "path"],
+    "clean_api_endpoint": ["client_ip", "request_url", "is_api", "path"],
+    "get_highest_traffic_endpoint_per_ip": ["client_ip", "is_api", "path"],
+    "count_parameter_values_for_endpoint": ["request_url"],
+    "get_avg_processing_time": ["client_ip", "request_verb", "is_api", "path", "processing_time"],
+    "search": ["time", "request_url", "is_api", "path"],
+    "rollup": ["time", "client_ip", "request_verb", "request_url", "is_api", "path", "processing_time"],
+}
+
+
+def _file_id(path):
+    return hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+
+
+def load_manifest(store_dir):
+    """Return the record of source files already ingested into the store."""
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"files": {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(store_dir, manifest):
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def ingest_logs(source_files, store_dir, chunksize=CHUNKSIZE):
+    """
+    Parse CSV log exports once and write them to a Parquet store partitioned by day.
+
+    Source files already recorded in the manifest with the same size and modification
+    time are skipped, so a daily refresh only parses the new exports. A file that
+    changed since it was ingested replaces its previous partitions.
+
+    Parameters:
+    - source_files (list): Paths of CSV log exports or raw ALB logs (.log.gz).
+    - store_dir (str): Directory of the store (store_dir/day=YYYY-MM-DD/*.parquet).
+    - chunksize (int, optional): Number of rows parsed at a time.
+
+    Returns:
+    - list: The source files that were ingested by this call.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    ingested = []
+
+    for source in source_files:
+        key = os.path.abspath(source)
+        stat = os.stat(source)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+        if manifest["files"].get(key) == entry:
+            continue
+
+        file_id = _file_id(source)
+        # drop partitions left by an earlier (changed or interrupted) ingest of this file
+        for old_part in glob.glob(os.path.join(store_dir, "day=*", f"{file_id}-*.parquet")):
+            os.remove(old_part)
+
+        # raw ALB logs are small per file and read whole, CSV exports in chunks
+        chunks = [read_alb_log(source)] if is_alb_log(source) else iter_log_chunks(source, chunksize=chunksize)
+        for i, chunk in enumerate(chunks):
+            # the store keeps the compact schema (categoricals, uint32 ips, Arrow strings)
+            parsed = compact_logs(LogFrame(chunk).data)
+            days = parsed["time"].dt.strftime("%Y-%m-%d")
+            for day, part in parsed.groupby(days):
+                day_dir = os.path.join(store_dir, f"day={day}")
+                os.makedirs(day_dir, exist_ok=True)
+                part.to_parquet(os.path.join(day_dir, f"{file_id}-{i:05d}.parquet"), index=False)
+
+        manifest["files"][key] = entry
+        save_manifest(store_dir, manifest)
+        ingested.append(source)
+
+    return ingested
+
+
+def load_logs(store_dir, columns=None, start=None, end=None):
+    """
+    Load parsed logs from the store, reading only the given columns and days.
+
+    Parameters:
+    - store_dir (str): Directory of the store.
+    - columns (list, optional): Columns to read. Default is every column.
+    - start (str, optional): First day to load (YYYY-MM-DD), inclusive.
+    - end (str, optional): Last day to load (YYYY-MM-DD), inclusive.
+
+    Returns:
+    - DataFrame: The parsed and typed logs.
+    """
+    frames = []
+    for day_dir in sorted(glob.glob(os.path.join(store_dir, "day=*"))):
+        day = os.path.basename(day_dir)[len("day="):]
+        if (start is not None and day < start) or (end is not None and day > end):
+            continue
+        for part in sorted(glob.glob(os.path.join(day_dir, "*.parquet"))):
+            frames.append(pd.read_parquet(part, columns=columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_logframe(store_dir, task=None, columns=None, start=None, end=None):
+    """
+    Load a LogFrame from the store without parsing the URLs again.
+
+    Parameters:
+    - task (str, optional): Name of the task function to run; only the columns listed
+      for it in TASK_COLUMNS are read. Ignored when columns is given.
+    """
+    if columns is None and task is not None:
+        columns = TASK_COLUMNS[task]
+    return LogFrame(load_logs(store_dir, columns, start, end))
@@ -0,0 +1,178 @@
+import os
+import glob
+import pandas as pd
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from logframe import LogFrame
+from alb_reader import is_alb_log, read_alb_log
+from aggregate import top_k_per_group
+from compact import decode_ips
+from ingest import merge_counts, finish_counts
+from sketches import LatencySketch
+
+
+def list_partitions(sources):
+    """
+    Expand sources into partitions: a logstore directory becomes one partition per
+    day, any other directory one per CSV or ALB log file, and files stay as they are.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    partitions = []
+    for source in sources:
+        if os.path.isdir(source):
+            days = sorted(glob.glob(os.path.join(source, "day=*")))
+            if days:
+                partitions.extend(days)
+            else:
+                partitions.extend(sorted(path for path in glob.glob(os.path.join(source, "*"))
+                                         if path.endswith(".csv") or is_alb_log(path)))
+        else:
+            partitions.append(source)
+    return partitions
+
+
+def read_partition(partition, columns=None):
+    """Read one partition (logstore day directory, ALB log or CSV export) as a DataFrame."""
+    if os.path.isdir(partition):
+        parts = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+        return pd.concat([pd.read_parquet(part, columns=columns) for part in parts], ignore_index=True)
+    if is_alb_log(partition):
+        return read_alb_log(partition)
+    return pd.read_csv(partition, usecols=columns)
+
+
+def load_partition(partition):
+    """Load one partition as a LogFrame."""
+    return LogFrame(read_partition(partition))
+
+
+def _plain(frame):
+    # categorical keys of different partitions have different categories, so the
+    # partial results are keyed by plain values to merge cleanly
+    categorical = [column for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)]
+    return frame.astype({column: object for column in categorical}) if categorical else frame
+
+
+def run_partitions(func, partitions, workers=None):
+    """
+    Apply func to every partition, in a process pool when workers > 1.
+
+    Parameters:
+    - func (callable): Picklable function of one partition returning a partial result.
+    - partitions (list): Partitions, see list_partitions.
+    - workers (int, optional): Number of processes. Default is one per core, at most
+      one per partition; 1 runs serially in this process.
+
+    Returns:
+    - list: The partial results in partition order, so merging them gives the same
+      result for any number of workers.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(partitions), 1))
+    if workers == 1:
+        return [func(partition) for partition in partitions]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, partitions))
+
+
+def _merge_all(partials):
+    total = None
+    for partial_counts in partials:
+        if partial_counts is None:
+            continue
+        keys = list(partial_counts.index.names)
+        # stored partitions pack client_ip as uint32; merge on the dotted strings the
+        # serial functions group by, so order and dtypes match the in-memory result
+        partial_counts = _plain(decode_ips(partial_counts.rename("count").reset_index())).set_index(keys)["count"]
+        total = merge_counts(total, partial_counts)
+    return total
+
+
+# per-partition aggregations (module level so the process pool can pickle them)
+
+def _ip_counts(partition, search_keyword):
+    data = read_partition(partition, ["client_ip", "request_url"])
+    return data[data["request_url"].str.contains(search_keyword, na=False)].groupby("client_ip", observed=True).size()
+
+
+def _api_request_counts(partition):
+    api = load_partition(partition).api
+    return api.groupby(["request_verb", "path"], observed=True).size()
+
+
+def _endpoint_ip_counts(partition):
+    log = load_partition(partition)
+    pairs = pd.DataFrame({"client_ip": log.api["client_ip"], "endpoint_cleaned": log.endpoint})
+    return pairs.groupby(["client_ip", "endpoint_cleaned"], observed=True).size()
+
+
+def _latency_sketch(partition, grouping_columns):
+    api = load_partition(partition).api
+    # group on dotted ip strings, as the serial function does (see _merge_all)
+    frame = _plain(decode_ips(api[grouping_columns + ["processing_time"]]))
+    return LatencySketch(grouping_columns).update(frame, "processing_time")
+
+
+def _search_counts(partition, by):
+    search = load_partition(partition).search
+    if len(search) == 0:
+        return None
+    return search.groupby(by, observed=True).size()
+
+
+# merged results, in the output format of the matching task function
+
+def parallel_ip_counts(sources, search_keyword, workers=None):
+    """Per-partition version of the ip counts of task2.analyze_requests."""
+    partials = run_partitions(partial(_ip_counts, search_keyword=search_keyword), list_partitions(sources), workers)
+    return decode_ips(finish_counts(_merge_all(partials), ["client_ip"]))
+
+
+def parallel_api_requests(sources, pivot=False, workers=None):
+    """Per-partition version of task3.get_api_request."""
+    partials = run_partitions(_api_request_counts, list_partitions(sources), workers)
+    api_data = finish_counts(_merge_all(partials), ["request_verb", "path"]).sort_values(by="count", ascending=False)
+    if pivot:
+        return api_data.pivot_table(index="path", columns="request_verb", values="count", fill_value=0, observed=True)
+    return api_data
+
+
+def parallel_highest_traffic_endpoint_per_ip(sources, k=1, workers=None):
+    """Per-partition version of task4.get_highest_traffic_endpoint_per_ip."""
+    partials = run_partitions(_endpoint_ip_counts, list_partitions(sources), workers)
+    counts = _merge_all(partials)
+    if counts is None:
+        return pd.DataFrame(columns=["client_ip", "max_requests", "max_endpoint"])
+    counts = counts.astype("int64").sort_index()
+    top_endpoints = top_k_per_group(counts, k).rename(columns={"count": "max_requests", "endpoint_cleaned": "max_endpoint"})
+    return decode_ips(top_endpoints[["client_ip", "max_requests", "max_endpoint"]])
+
+
+def parallel_avg_processing_time(sources, separate_by_ip=False, percentiles=None, workers=None):
+    """
+    Per-partition version of task6.get_avg_processing_time. Means and variances are
+    merged from per-partition moments, so they match the serial result up to
+    floating-point rounding.
+    """
+    grouping_columns = ["request_verb", "path"] + (["client_ip"] if separate_by_ip else [])
+    partials = run_partitions(partial(_latency_sketch, grouping_columns=grouping_columns),
+                              list_partitions(sources), workers)
+    sketch = LatencySketch(grouping_columns)
+    for partial_sketch in partials:
+        sketch.merge(partial_sketch)
+    if sketch.moments is None:
+        columns = ["Average Processing Time", "Variance"] + [f"p{p:g}" for p in percentiles or []]
+        return pd.DataFrame(columns=grouping_columns + columns)
+
+    result = sketch.summary().sort_values(grouping_columns).reset_index(drop=True)
+    result = result.drop(columns="count").rename(columns={"mean": "Average Processing Time", "var": "Variance"})
+    if percentiles:
+        result = result.merge(sketch.quantiles([p / 100 for p in percentiles]), on=grouping_columns, how="left")
+    return decode_ips(result)
+
+
+def parallel_search_counts(sources, by, workers=None):
+    """Number of fuzzySearch entries per the given column(s), like task7_method.search_counts."""
+    partials = run_partitions(partial(_search_counts, by=by), list_partitions(sources), workers)
+    counts = _merge_all(partials)
+    return counts.astype("int64").sort_index() if counts is not None else pd.Series(dtype="int64")
@@ -0,0 +1,113 @@
+import json
+import pandas as pd
+from collections import Counter
+from urllib.parse import parse_qs
+from logframe import as_logframe
+from endpoints import template_endpoint
+
+# file name of the index when it is kept next to a logstore directory
+INDEX_NAME = "param_index.json"
+
+
+class ParamIndex:
+    """
+    Inverted index of query parameter values: endpoint template -> parameter -> value -> count.
+
+    The index is built in one pass over the distinct (endpoint, query string) pairs of a
+    dataset, after which every endpoint/parameter lookup is a dictionary read. Only the
+    first value of a repeated parameter is counted and blank values are skipped, as
+    in task5.count_parameter_values_for_endpoint.
+
+    Parameters:
+    - freq (str, optional): If given (e.g. "D"), counts are also kept per time bucket so
+      lookups can be limited to a date range. Default is None.
+    """
+
+    def __init__(self, freq=None):
+        self.freq = freq
+        self.counts = {}
+        self.bucket_counts = {}
+
+    @classmethod
+    def build(cls, data, freq=None):
+        """Build the index of a DataFrame or LogFrame."""
+        return cls(freq).update(data)
+
+    def update(self, data):
+        """Add the requests of new data to the index."""
+        log = as_logframe(data)
+        keys = ["endpoint", "query"]
+        pairs = pd.DataFrame({"endpoint": log.endpoint, "query": log.api["query"]})
+        if self.freq is not None:
+            time = log.api["time"]
+            if not pd.api.types.is_datetime64_any_dtype(time):
+                time = pd.to_datetime(time)
+            pairs["bucket"] = time.dt.floor(self.freq).dt.strftime("%Y-%m-%dT%H:%M:%S")
+            keys.append("bucket")
+        pair_counts = pairs.dropna(subset=["query"]).groupby(keys).size()
+
+        for key, count in pair_counts.items():
+            endpoint, query, count = key[0], key[1], int(count)
+            for parameter, values in parse_qs(query).items():
+                value = values[0]
+                self.counts.setdefault(endpoint, {}).setdefault(parameter, Counter())[value] += count
+                if self.freq is not None:
+                    buckets = self.bucket_counts.setdefault(endpoint, {}).setdefault(parameter, {})
+                    buckets.setdefault(key[2], Counter())[value] += count
+        return self
+
+    def lookup(self, endpoint, parameter, start=None, end=None):
+        """
+        Return the counts of each value of a parameter for an endpoint, like value_counts().
+
+        Parameters:
+        - endpoint (str): Api endpoint, with or without the leading '/api'; ids are
+          matched through their template (see endpoints.template_endpoint).
+        - parameter (str): Query parameter name.
+        - start, end (str, optional): Bucket range (inclusive), for an index built with freq.
+        """
+        if endpoint.startswith('/api'):
+            endpoint = endpoint[len('/api'):]
+        endpoint = template_endpoint(endpoint)
+
+        if start is None and end is None:
+            counts = self.counts.get(endpoint, {}).get(parameter, Counter())
+        else:
+            if self.freq is None:
+                raise ValueError("Date ranges need an index built with freq")
+            start = pd.Timestamp(start).strftime("%Y-%m-%dT%H:%M:%S") if start is not None else None
+            end = pd.Timestamp(end).strftime("%Y-%m-%dT%H:%M:%S") if end is not None else None
+            counts = Counter()
+            for bucket, bucket_counts in self.bucket_counts.get(endpoint, {}).get(parameter, {}).items():
+                if (start is None or bucket >= start) and (end is None or bucket <= end):
+                    counts.update(bucket_counts)
+
+        parameter_count = pd.Series(dict(counts), dtype="int64", name="count").sort_values(ascending=False)
+        parameter_count.index.name = parameter
+        return parameter_count
+
+    def parameters(self, endpoint):
+        """Return the parameter names seen for an endpoint."""
+        if endpoint.startswith('/api'):
+            endpoint = endpoint[len('/api'):]
+        return sorted(self.counts.get(template_endpoint(endpoint), {}))
+
+    def save(self, path):
+        """Write the index to a JSON file."""
+        with open(path, "w") as f:
+            json.dump({"freq": self.freq, "counts": self.counts, "bucket_counts": self.bucket_counts}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save."""
+        with open(path) as f:
+            stored = json.load(f)
+        index = cls(stored["freq"])
+        index.counts = {endpoint: {parameter: Counter(values) for parameter, values in parameters.items()}
+                        for endpoint, parameters in stored["counts"].items()}
+        index.bucket_counts = {
+            endpoint: {parameter: {bucket: Counter(values) for bucket, values in buckets.items()}
+                       for parameter, buckets in parameters.items()}
+            for endpoint, parameters in stored["bucket_counts"].items()
+        }
+        return index
@@ -0,0 +1,162 @@
+import os
+import time
+import argparse
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from logframe import LogFrame
+from logstore import MANIFEST_NAME, load_logframe
+from alb_reader import is_alb_log, list_alb_logs, read_alb_logs
+from task4 import get_highest_traffic_endpoint_per_ip, plot_top_n_endpoints
+from task5 import count_parameter_values_for_endpoint, plot_parameter_count
+from task7_method import (search_section_view, search_category_view, search_query_view_split,
+                          daily_search_counts, plot_section_counts, plot_category_counts,
+                          plot_category_split, plot_query_split, plot_time_series)
+
+
+def load_source(source):
+    """Load a CSV export, a logstore directory or raw ALB logs as one LogFrame."""
+    if os.path.isdir(source) and os.path.exists(os.path.join(source, MANIFEST_NAME)):
+        return load_logframe(source)
+    if os.path.isdir(source) or is_alb_log(source):
+        return LogFrame(read_alb_logs(list_alb_logs(source)))
+    return LogFrame(pd.read_csv(source))
+
+
+# intermediate results: name -> (dependencies, function of the options and the dependency values).
+# Everything hangs off one LogFrame, whose cached search/endpoint/param_index columns
+# are parsed once and shared by the nodes that use them
+NODES = {
+    "log": ((), lambda options: load_source(options["source"])),
+    "section_counts": (("log",), lambda options, log: search_section_view(log)),
+    "total_searches": (("section_counts",), lambda options, section_counts: section_counts.sum()),
+    "category_counts": (("log",), lambda options, log: search_category_view(log)),
+    "category_split": (("log",), lambda options, log: search_category_view(log, section_split=True)),
+    "query_split": (("log",), lambda options, log: search_query_view_split(log, options["top"])),
+    "daily_counts": (("log",), lambda options, log: daily_search_counts(log, section_split=True)),
+    "top_endpoints_per_ip": (("log",), lambda options, log: get_highest_traffic_endpoint_per_ip(log)),
+    "parameter_count": (("log",), lambda options, log: count_parameter_values_for_endpoint(
+        log, options["endpoint"], options["parameter"])),
+}
+
+# output files: name -> (intermediate results, function of the options and their values
+# returning a matplotlib figure, Plotly figure or Altair chart)
+CHARTS = {
+    "search_sections.png": (("section_counts",), lambda options, counts: plot_section_counts(counts)),
+    "search_categories.png": (("category_counts", "total_searches"),
+                              lambda options, counts, total: plot_category_counts(counts, total)),
+    "search_categories_split.html": (("category_split",), lambda options, split: plot_category_split(*split)),
+    "search_queries_split.html": (("query_split",),
+                                  lambda options, split: plot_query_split(*split, options["top"])),
+    "search_time_series.png": (("daily_counts",), lambda options, daily: plot_time_series(daily, True)),
+    "top_endpoints.png": (("top_endpoints_per_ip",),
+                          lambda options, top: plot_top_n_endpoints(top, options["top"], show=False)),
+    "parameter_count.png": (("parameter_count",), lambda options, counts: plot_parameter_count(counts).gcf()),
+}
+
+
+def evaluate(names, options, results=None, timings=None):
+    """
+    Compute the named intermediate results and everything they depend on, each once.
+
+    Parameters:
+    - names (iterable): Nodes of NODES to compute.
+    - options (dict): Report options (source, top, endpoint, parameter).
+    - results (dict, optional): Results computed so far; filled in place.
+    - timings (dict, optional): Seconds per computed node; filled in place.
+
+    Returns:
+    - dict: Node name -> value, for the requested nodes and their dependencies.
+    """
+    results = {} if results is None else results
+    for name in names:
+        if name in results:
+            continue
+        dependencies, func = NODES[name]
+        evaluate(dependencies, options, results, timings)
+        start = time.perf_counter()
+        results[name] = func(options, *[results[dependency] for dependency in dependencies])
+        if timings is not None:
+            timings[name] = time.perf_counter() - start
+    return results
+
+
+def save_chart(chart, path):
+    """Write a matplotlib figure (PNG), Plotly figure (HTML) or Altair chart (HTML) to path."""
+    if hasattr(chart, "savefig"):
+        chart.savefig(path, bbox_inches="tight")
+        plt.close(chart)
+    elif hasattr(chart, "write_html"):
+        chart.write_html(path)
+    else:
+        chart.save(path)
+    return path
+
+
+def render_chart(name, values, options, out_dir):
+    # runs in a worker process: only the chart name and its (small) inputs are pickled
+    _, func = CHARTS[name]
+    return save_chart(func(options, *values), os.path.join(out_dir, name))
+
+
+def build_report(source, out_dir, charts=None, top=10, endpoint=None, parameter=None, workers=None):
+    """
+    Render the usage charts of one log source to files, parsing the logs once.
+
+    The intermediate results the charts need are computed once in this process, then
+    the charts are drawn and saved in a process pool.
+
+    Parameters:
+    - source (str): CSV export, logstore directory, or ALB log file/directory.
+    - out_dir (str): Directory for the chart files.
+    - charts (list, optional): Names of CHARTS to render. Default is all of them, without
+      parameter_count.png unless endpoint and parameter are given.
+    - top (int, optional): Number of top queries and endpoints to show. Default is 10.
+    - endpoint, parameter (str, optional): Endpoint and query parameter of parameter_count.png.
+    - workers (int, optional): Number of rendering processes. Default is one per core;
+      1 renders in this process.
+
+    Returns:
+    - tuple: List of the written files and a dict of seconds per computed node.
+    """
+    options = {"source": source, "top": top, "endpoint": endpoint, "parameter": parameter}
+    if charts is None:
+        charts = [name for name in CHARTS
+                  if name != "parameter_count.png" or (endpoint is not None and parameter is not None)]
+    os.makedirs(out_dir, exist_ok=True)
+
+    timings = {}
+    results = evaluate({node for name in charts for node in CHARTS[name][0]}, options, timings=timings)
+    jobs = [(name, [results[node] for node in CHARTS[name][0]]) for name in charts]
+
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        paths = [render_chart(name, values, options, out_dir) for name, values in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_chart, name, values, options, out_dir) for name, values in jobs]
+            paths = [future.result() for future in futures]
+    timings["render"] = time.perf_counter() - start
+    return paths, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the usage report charts to files.")
+    parser.add_argument("source", help="CSV export, logstore directory, or ALB log file/directory")
+    parser.add_argument("out_dir", help="output directory for the charts")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), help="charts to render (default all)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--endpoint", help="endpoint of the parameter count chart, e.g. /issues/fuzzySearch")
+    parser.add_argument("--parameter", help="query parameter of the parameter count chart, e.g. category")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    paths, timings = build_report(args.source, args.out_dir, args.charts, args.top,
+                                  args.endpoint, args.parameter, args.workers)
+    for name, seconds in timings.items():
+        print(f"{name:<24} {seconds:8.2f}s")
+    print(f"Successfully save {len(paths)} charts to {args.out_dir}")
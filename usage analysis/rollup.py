@@ -0,0 +1,113 @@
+import pandas as pd
+from logframe import as_logframe
+
+CUBE_KEYS = ["bucket", "section", "category", "request_verb", "endpoint"]
+CUBE_VALUES = ["count", "latency_count", "latency_sum"]
+
+
+class RollupCube:
+    """
+    Pre-aggregated api request counts and latency sums per time bucket.
+
+    Each row of the cube holds the number of api requests and the sum of their
+    processing time for one (bucket, section, category, request_verb, endpoint)
+    combination, plus client_ip when by_ip is True. section and category are only set
+    for fuzzySearch requests. The section/category/time-series views in task7_method
+    accept a cube in place of the raw data, so a dashboard over many days reads cube
+    rows instead of log lines.
+
+    Parameters:
+    - freq (str, optional): Time bucket size, e.g. "min", "h" or "D". Default is "D".
+    - by_ip (bool, optional): If True, keep client_ip as a key as well. Default is False.
+    """
+
+    def __init__(self, freq="D", by_ip=False):
+        self.freq = freq
+        self.keys = CUBE_KEYS + (["client_ip"] if by_ip else [])
+        self.rows = pd.DataFrame(columns=self.keys + CUBE_VALUES)
+
+    def update(self, data, replace_from=None):
+        """
+        Add the requests of new log data to the cube.
+
+        Parameters:
+        - data (DataFrame or LogFrame): New request data.
+        - replace_from (str or Timestamp, optional): Drop the cube rows from this bucket
+          on before adding, e.g. to refresh a day that was only partly logged.
+        """
+        if replace_from is not None:
+            self.rows = self.rows[self.rows["bucket"] < self._bound(replace_from)]
+        return self._add(self._aggregate(as_logframe(data)))
+
+    def merge(self, other):
+        """Fold another cube with the same keys and bucket size into this one."""
+        if other.freq != self.freq or other.keys != self.keys:
+            raise ValueError("Can only merge cubes with the same keys and bucket size")
+        return self._add(other.rows)
+
+    def _bound(self, value):
+        # a time bound in the timezone of the buckets (ALB and logstore times are UTC)
+        bound = pd.Timestamp(value)
+        buckets = self.rows["bucket"]
+        tz = buckets.dt.tz if pd.api.types.is_datetime64_any_dtype(buckets) else None
+        if tz is not None:
+            return bound.tz_localize(tz) if bound.tzinfo is None else bound.tz_convert(tz)
+        return bound.tz_convert(None) if bound.tzinfo is not None else bound
+
+    def _aggregate(self, log):
+        api = log.api
+        time = api["time"]
+        if not pd.api.types.is_datetime64_any_dtype(time):
+            time = pd.to_datetime(time)
+        search = log.search
+        rows = pd.DataFrame({
+            "bucket": time.dt.floor(self.freq),
+            "section": search["section"].reindex(api.index),
+            "category": search["category"].reindex(api.index),
+            "request_verb": api["request_verb"],
+            "endpoint": log.endpoint,
+            "latency": api["processing_time"] if "processing_time" in api.columns else float("nan"),
+        })
+        if "client_ip" in self.keys:
+            rows["client_ip"] = api["client_ip"]
+        grouped = rows.groupby(self.keys, dropna=False, observed=True)["latency"]
+        return grouped.agg(count="size", latency_count="count", latency_sum="sum").reset_index()
+
+    def _add(self, rows):
+        if len(self.rows) == 0:
+            self.rows = rows[self.keys + CUBE_VALUES].reset_index(drop=True)
+            return self
+        combined = pd.concat([self.rows, rows], ignore_index=True)
+        self.rows = combined.groupby(self.keys, dropna=False, observed=True)[CUBE_VALUES].sum().reset_index()
+        return self
+
+    @property
+    def last_bucket(self):
+        """Latest time bucket in the cube (None if empty), where the next update can resume."""
+        return self.rows["bucket"].max() if len(self.rows) else None
+
+    def search_rows(self, start=None, end=None):
+        """Cube rows of fuzzySearch requests, optionally limited to [start, end]."""
+        rows = self.rows[self.rows["section"].notna()]
+        if start is not None:
+            rows = rows[rows["bucket"] >= self._bound(start)]
+        if end is not None:
+            rows = rows[rows["bucket"] <= self._bound(end)]
+        return rows
+
+    def search_counts(self, by, start=None, end=None):
+        """Number of fuzzySearch requests per the given keys, like data_search.groupby(by).size()."""
+        return self.search_rows(start, end).groupby(by, observed=True)["count"].sum().astype("int64")
+
+    def save(self, path):
+        """Write the cube to a Parquet file."""
+        self.rows.assign(freq=self.freq).to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        """Read a cube written by save."""
+        rows = pd.read_parquet(path)
+        freq = rows["freq"].iloc[0] if len(rows) else "D"
+        cube = cls(freq, by_ip="client_ip" in rows.columns)
+        cube.rows = rows.drop(columns="freq")
+        return cube
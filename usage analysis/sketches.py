@@ -0,0 +1,293 @@
+import numpy as np
+import pandas as pd
+
+# bucket holding values at or below LatencySketch.min_value
+ZERO_BUCKET = np.iinfo(np.int32).min
+
+
+class LatencySketch:
+    """
+    Mergeable per-group latency histogram with log-sized buckets (DDSketch style).
+
+    A value x > min_value falls into bucket i = ceil(log(x) / log(gamma)) with
+    gamma = (1 + alpha) / (1 - alpha), and every quantile is reported as the bucket
+    midpoint 2 * gamma**i / (gamma + 1). The returned quantile is therefore within a
+    relative error of alpha (relative_accuracy) of the exact value of that rank, no
+    matter how many rows, chunks or processes the sketch was built from. Values at or
+    below min_value are reported as 0. Negative values (ALB logs -1 for requests that
+    never reached a target) and NaN are left out of the quantiles. The exact count,
+    mean and variance of every group are kept alongside and merged as well.
+
+    Memory is one count per (group, bucket); with alpha = 0.01 latencies from 1 ms to
+    100 s use at most about 600 buckets per group.
+
+    Parameters:
+    - group_columns (list): Columns the latencies are grouped by.
+    - relative_accuracy (float, optional): alpha, the relative error bound. Default is 0.01.
+    - min_value (float, optional): Smallest latency resolved, in seconds. Default is 1e-6.
+    """
+
+    def __init__(self, group_columns, relative_accuracy=0.01, min_value=1e-6):
+        self.group_columns = list(group_columns)
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.counts = None
+        self.moments = None
+
+    def _buckets(self, values):
+        buckets = np.full(len(values), ZERO_BUCKET, dtype=np.int32)
+        positive = values > self.min_value
+        buckets[positive] = np.ceil(np.log(values[positive]) / np.log(self.gamma))
+        return buckets
+
+    def _values(self, buckets):
+        values = 2 * self.gamma ** buckets.astype(float) / (self.gamma + 1)
+        return np.where(buckets == ZERO_BUCKET, 0.0, values)
+
+    def update(self, frame, value_column):
+        """Add the latencies in frame[value_column], grouped by group_columns."""
+        sketched = frame[frame[value_column] >= 0]
+        values = sketched[value_column].to_numpy(dtype=float)
+        keys = sketched[self.group_columns].assign(bucket=self._buckets(values))
+        self._merge_counts(keys.groupby(self.group_columns + ["bucket"], observed=True).size())
+
+        # mean and variance keep every non-NaN value, like get_avg_processing_time; groups
+        # without any are kept with n = 0 so they still get a (NaN) row in summary()
+        grouped = frame.groupby(self.group_columns, observed=True)[value_column]
+        n = grouped.count()
+        moments = pd.DataFrame({"n": n, "mean": grouped.mean(), "m2": grouped.var(ddof=0) * n}).fillna(0.0)
+        self._merge_moments(moments)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch over the same groups into this one, e.g. from another chunk or day."""
+        if other.gamma != self.gamma or other.group_columns != self.group_columns:
+            raise ValueError("Can only merge sketches with the same groups and relative accuracy")
+        if other.counts is not None:
+            self._merge_counts(other.counts)
+            self._merge_moments(other.moments)
+        return self
+
+    def _merge_counts(self, counts):
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+
+    def _merge_moments(self, moments):
+        if self.moments is None:
+            self.moments = moments
+            return
+        left, right = self.moments.align(moments, join="outer", fill_value=0)
+        n = left["n"] + right["n"]
+        delta = right["mean"] - left["mean"]
+        divisor = n.where(n > 0, 1)
+        # Chan et al. parallel update of mean and sum of squared deviations
+        mean = left["mean"] + delta * right["n"] / divisor
+        m2 = left["m2"] + right["m2"] + delta ** 2 * left["n"] * right["n"] / divisor
+        self.moments = pd.DataFrame({"n": n, "mean": mean, "m2": m2})
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """
+        Return the estimated quantiles of every group.
+
+        Returns:
+        - DataFrame: The group columns and one column per quantile, named p50, p95, ...
+        """
+        if self.counts is None:
+            return pd.DataFrame(columns=self.group_columns + [f"p{q * 100:g}" for q in qs])
+        counts = self.counts.sort_index().rename("count").reset_index()
+        grouped = counts.groupby(self.group_columns, sort=False, observed=True)["count"]
+        counts["cumulative"] = grouped.cumsum()
+        total = grouped.transform("sum")
+
+        result = counts[self.group_columns].drop_duplicates().reset_index(drop=True)
+        for q in qs:
+            # first bucket whose cumulative count passes the rank q * (n - 1)
+            reached = counts[counts["cumulative"] > q * (total - 1)]
+            first = reached.groupby(self.group_columns, sort=False, observed=True).head(1)
+            estimate = first[self.group_columns].assign(value=self._values(first["bucket"].to_numpy()))
+            result = result.merge(estimate.rename(columns={"value": f"p{q * 100:g}"}), on=self.group_columns, how="left")
+        return result
+
+    def summary(self):
+        """Return count, mean and sample variance per group from the merged moments (NaN without values)."""
+        moments = self.moments
+        variance = moments["m2"] / (moments["n"] - 1)
+        return pd.DataFrame({
+            "count": moments["n"],
+            "mean": moments["mean"].where(moments["n"] > 0),
+            "var": variance.where(moments["n"] > 1),
+        }).reset_index()
+
+
+def hash_values(values):
+    """64-bit hashes of a Series or array of values, computed in a vectorized pass."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+
+
+class SpaceSaving:
+    """
+    Mergeable heavy-hitter summary keeping at most `capacity` counters (SpaceSaving).
+
+    Every kept count is an overestimate of the true count by at most its `error`, and
+    any item left out has a true count of at most `floor`. Items whose true count is
+    above total / capacity are always kept. Chunks are first counted exactly and then
+    folded in, so memory is the capacity plus one chunk.
+
+    Parameters:
+    - capacity (int, optional): Number of counters kept. Default is 1000.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.errors = pd.Series(dtype="int64")
+        self.floor = 0
+        self.total = 0
+
+    def update(self, values):
+        """Add a chunk of values (Series) to the summary."""
+        values = pd.Series(values).dropna()
+        counts = values.value_counts()
+        partial = SpaceSaving(self.capacity)
+        partial.counts = counts.astype("int64")
+        partial.errors = pd.Series(0, index=counts.index, dtype="int64")
+        partial.total = len(values)
+        return self.merge(partial)
+
+    def merge(self, other):
+        """Fold another summary (e.g. of another chunk or file) into this one."""
+        items = self.counts.index.union(other.counts.index)
+        counts = (self.counts.reindex(items, fill_value=self.floor)
+                  + other.counts.reindex(items, fill_value=other.floor))
+        errors = (self.errors.reindex(items, fill_value=self.floor)
+                  + other.errors.reindex(items, fill_value=other.floor))
+        floor = self.floor + other.floor
+
+        counts = counts.sort_values(ascending=False, kind="mergesort")
+        if len(counts) > self.capacity:
+            floor = max(floor, int(counts.iloc[self.capacity]))
+            counts = counts.iloc[:self.capacity]
+        self.counts = counts
+        self.errors = errors.reindex(counts.index)
+        self.floor = floor
+        self.total += other.total
+        return self
+
+    def top(self, n, count_min=None):
+        """
+        Return the n most frequent items and their estimated counts, like
+        value_counts().head(n). A CountMinSketch over the same data tightens the counts.
+        """
+        counts = self.counts
+        if count_min is not None:
+            counts = np.minimum(counts, count_min.query(counts.index.to_series()))
+        return counts.sort_values(ascending=False, kind="mergesort").head(n).rename("count")
+
+
+class CountMinSketch:
+    """
+    Mergeable Count-Min sketch for point frequency queries in fixed memory.
+
+    With width w and depth d, a queried count overestimates the true count by at most
+    e / w * total with probability 1 - exp(-d).
+
+    Parameters:
+    - width (int, optional): Counters per row. Default is 2**16.
+    - depth (int, optional): Number of rows. Default is 4.
+    """
+
+    def __init__(self, width=2 ** 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        # double hashing: column_i = h1 + i * h2 (mod width)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values):
+        """Add a chunk of values (Series) to the sketch."""
+        counts = pd.Series(values).dropna().value_counts()
+        columns = self._columns(hash_values(counts.index.to_series()))
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts.to_numpy())
+        return self
+
+    def merge(self, other):
+        if other.table.shape != self.table.shape:
+            raise ValueError("Can only merge Count-Min sketches of the same width and depth")
+        self.table += other.table
+        return self
+
+    def query(self, values):
+        """Return the estimated count of each value, aligned with values."""
+        values = pd.Series(values)
+        columns = self._columns(hash_values(values))
+        estimates = self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+        return pd.Series(estimates, index=values.to_numpy())
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count estimator (HyperLogLog) in 2**precision bytes.
+
+    The standard error of the estimate is about 1.04 / sqrt(2**precision), 0.8% with
+    the default precision of 14.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values):
+        """Add a chunk of values (Series) to the estimator."""
+        hashes = hash_values(pd.Series(values).dropna())
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - p)) - 1)
+        # position of the leftmost 1 bit among the remaining 64 - p bits
+        bit_length = np.frexp(remaining.astype(np.float64))[1]
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Can only merge HyperLogLogs of the same precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """Return the estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # small range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+def approx_value_counts(values, top_nums, capacity=None, chunksize=100_000):
+    """
+    Approximate values.value_counts().head(top_nums) in fixed memory, feeding the
+    values to a SpaceSaving summary and a Count-Min sketch chunk by chunk.
+
+    Parameters:
+    - values (Series): Values to count.
+    - top_nums (int): Number of top values returned.
+    - capacity (int, optional): SpaceSaving counters. Default is 50 * top_nums.
+    """
+    heavy_hitters = SpaceSaving(capacity or 50 * top_nums)
+    count_min = CountMinSketch()
+    for start in range(0, len(values), chunksize):
+        chunk = values.iloc[start:start + chunksize]
+        heavy_hitters.update(chunk)
+        count_min.update(chunk)
+    counts = heavy_hitters.top(top_nums, count_min)
+    counts.index.name = values.name
+    return counts
@@ -0,0 +1,125 @@
+import sys
+import uuid
+import numpy as np
+import pandas as pd
+
+BASE_URL = "https://app.broadsighttracker.ca:443"
+# hosts addressed by IP literal, excluded by task7_method.data_api_filter
+IP_HOSTS = ["https://10.0.1.23:443", "https://172.31.8.140:443"]
+VERBS = np.array(["GET", "POST", "PUT", "DELETE"], dtype=object)
+VERB_WEIGHTS = [0.8, 0.12, 0.06, 0.02]
+CATEGORIES = np.array(["All", "Title", "Description", "Expert", "Unit", "Tags"], dtype=object)
+SEARCH_TERMS = np.array([
+    "covid", "tuition", "climate change", "housing", "election", "protest camp", "middle east",
+    "cancer research", "AI", "wildfire", "indigenous", "budget", "mental health", "vaccine",
+    "strike", "enrolment", "international students", "research funding", "opioid crisis", "heat wave",
+], dtype=object)
+EXPERT_NAMES = np.array(["Jane Doe", "John-Jose Nuñez", "Kurt Heinrich", "Katie DeRosa", "Martin MacMahon"], dtype=object)
+
+# (url kind, share of requests, median target processing time in seconds)
+URL_KINDS = [
+    ("issues_search", 0.22, 0.120),
+    ("services_search", 0.10, 0.100),
+    ("issue_by_uuid", 0.18, 0.030),
+    ("issue_comments", 0.08, 0.040),
+    ("service_by_id", 0.10, 0.025),
+    ("issue_list", 0.08, 0.080),
+    ("expert_by_name", 0.04, 0.050),
+    ("current_user", 0.10, 0.010),
+    ("ip_host_health", 0.04, 0.002),
+    ("static", 0.06, 0.0),
+]
+
+
+def _weights(n, exponent):
+    # Zipf-like popularity: the item of rank r has weight 1 / r**exponent
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _urls(kinds, rng):
+    rows = len(kinds)
+    urls = np.empty(rows, dtype=object)
+    names = [name for name, _, _ in URL_KINDS]
+    uuids = np.array([str(uuid.UUID(int=int(value))) for value in rng.integers(0, 2 ** 63, 5000)], dtype=object)
+    object_ids = np.array([f"{int(value):024x}" for value in rng.integers(0, 2 ** 63, 5000)], dtype=object)
+
+    def pick(values, count, exponent=1.1):
+        return values[rng.choice(len(values), count, p=_weights(len(values), exponent))]
+
+    for kind, name in enumerate(names):
+        mask = kinds == kind
+        count = int(mask.sum())
+        if count == 0:
+            continue
+        if name.endswith("_search"):
+            section = "issues" if name == "issues_search" else "services"
+            terms = pd.Series(pick(SEARCH_TERMS, count)).str.replace(" ", "%20", regex=False).to_numpy()
+            category = pick(CATEGORIES, count, 0.8)
+            urls[mask] = (f"{BASE_URL}/api/{section}/fuzzySearch?queryString=" + terms + "&category=" + category)
+        elif name == "issue_by_uuid":
+            urls[mask] = f"{BASE_URL}/api/issues/" + pick(uuids, count)
+        elif name == "issue_comments":
+            urls[mask] = f"{BASE_URL}/api/issues/" + pick(object_ids, count) + "/comments"
+        elif name == "service_by_id":
+            urls[mask] = f"{BASE_URL}/api/services/" + rng.integers(1, 20000, count).astype(str).astype(object)
+        elif name == "issue_list":
+            urls[mask] = f"{BASE_URL}/api/issues?page=" + rng.integers(1, 50, count).astype(str).astype(object) + "&limit=20"
+        elif name == "expert_by_name":
+            urls[mask] = f"{BASE_URL}/api/experts/" + pd.Series(pick(EXPERT_NAMES, count)).str.replace(" ", "%20", regex=False).to_numpy()
+        elif name == "current_user":
+            urls[mask] = f"{BASE_URL}/api/users/me"
+        elif name == "ip_host_health":
+            urls[mask] = np.array(IP_HOSTS, dtype=object)[rng.integers(0, len(IP_HOSTS), count)] + "/api/health"
+        else:
+            urls[mask] = f"{BASE_URL}/static/js/main.js"
+    return urls
+
+
+def generate_logs(rows, days=30, start="2024-05-01", seed=0, n_ips=5000):
+    """
+    Generate a deterministic synthetic access log with the columns of the CSV export.
+
+    URLs follow the shapes of the real logs: fuzzySearch requests with percent-encoded
+    queryString and category parameters, UUID/ObjectId/numeric id paths, percent-encoded
+    names, non-api static files and IP-literal hosts that data_api_filter excludes.
+    Client ips and search terms are Zipf-skewed, target processing times are log-normal
+    around a median per URL kind, and about 0.5% of requests fail with -1 times as
+    in ALB logs.
+
+    Parameters:
+    - rows (int): Number of requests.
+    - days (int, optional): Number of days the requests are spread over. Default is 30.
+    - start (str, optional): First day. Default is "2024-05-01".
+    - seed (int, optional): Random seed; the same seed gives the same log. Default is 0.
+    - n_ips (int, optional): Number of distinct client ips. Default is 5000.
+    """
+    rng = np.random.default_rng(seed)
+    ips = np.array([f"{10 + i % 200}.{(i // 200) % 256}.{(i * 7) % 256}.{i % 251 + 1}" for i in range(n_ips)], dtype=object)
+    seconds = np.sort(rng.integers(0, days * 86400, rows))
+
+    kinds = rng.choice(len(URL_KINDS), rows, p=[share for _, share, _ in URL_KINDS])
+    medians = np.array([median for _, _, median in URL_KINDS])[kinds]
+    target_time = np.where(medians > 0, medians * rng.lognormal(0.0, 0.6, rows), 0.0)
+    failed = rng.random(rows) < 0.005
+
+    logs = pd.DataFrame({
+        "time": (pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "client_ip": ips[rng.choice(n_ips, rows, p=_weights(n_ips, 1.05))],
+        "request_verb": VERBS[rng.choice(len(VERBS), rows, p=VERB_WEIGHTS)],
+        "request_url": _urls(kinds, rng),
+        "request_processing_time": rng.exponential(0.0005, rows).round(6),
+        "target_processing_time": target_time.round(6),
+        "response_processing_time": rng.exponential(0.0003, rows).round(6),
+    })
+    logs.loc[failed, ["request_processing_time", "target_processing_time", "response_processing_time"]] = -1.0
+    return logs
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python synthetic.py <rows> <output_csv> [seed]")
+    else:
+        seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        generate_logs(int(sys.argv[1]), seed=seed).to_csv(sys.argv[2], index=False)
+        print("Successfully save synthetic logs as csv")
@@ -1,13 +1,22 @@
 import pandas as pd
 import sys
 import os
-def analyze_requests(file_path, search_keyword):
-    # Load the data from CSV
-    data = pd.read_csv(file_path)
-    # Filter rows where the ‘request_url’ column contains the specified search keyword
-    filtered_data = data[data["request_url"].str.contains(search_keyword, na=False)]
-    # Group by ‘client_ip’ and count the occurrences
-    ip_counts = filtered_data.groupby("client_ip").size().reset_index(name="count")
+from ingest import count_ip_requests, approx_ip_counts, CHUNKSIZE
+def analyze_requests(file_path, search_keyword, chunksize=None, approx=False, top=20):
+    if approx:
+        # Estimate the top ips and the number of distinct ips with streaming sketches
+        ip_counts, distinct_ips = approx_ip_counts(file_path, search_keyword, top, chunksize or CHUNKSIZE)
+        print(f"Approximately {distinct_ips} distinct ips, top {top}:")
+    elif chunksize:
+        # Stream the CSV in chunks and merge the per-chunk ip counts (constant memory)
+        ip_counts = count_ip_requests(file_path, search_keyword, chunksize)
+    else:
+        # Load the data from CSV
+        data = pd.read_csv(file_path)
+        # Filter rows where the ‘request_url’ column contains the specified search keyword
+        filtered_data = data[data["request_url"].str.contains(search_keyword, na=False)]
+        # Group by ‘client_ip’ and count the occurrences
+        ip_counts = filtered_data.groupby("client_ip").size().reset_index(name="count")
     # Print the counts of IPs
     print(ip_counts)
 
@@ -18,7 +27,7 @@ def analyze_requests(file_path, search_keyword):
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
     # Generate dynamic file name using the search keyword
-    file_name = f"ip_counts_{search_keyword}.csv"
+    file_name = f"ip_counts_{search_keyword}_approx.csv" if approx else f"ip_counts_{search_keyword}.csv"
     # Generate full file path
     file_path = os.path.join(folder_path, file_name)
     
@@ -27,8 +36,11 @@ def analyze_requests(file_path, search_keyword):
     print("Successfully save search result as csv")
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python task2.py <file_path> <search_keyword>")
+        print("Usage: python task2.py <file_path> <search_keyword> [chunksize] [--approx]")
     else:
-        file_path = sys.argv[1]
-        search_keyword = sys.argv[2]
-        analyze_requests(file_path, search_keyword)
\ No newline at end of file
+        approx = "--approx" in sys.argv
+        args = [arg for arg in sys.argv[1:] if arg != "--approx"]
+        file_path = args[0]
+        search_keyword = args[1]
+        chunksize = int(args[2]) if len(args) > 2 else None
+        analyze_requests(file_path, search_keyword, chunksize, approx)
\ No newline at end of file
@@ -3,43 +3,44 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from urllib.parse import unquote
+from logframe import as_logframe
+from aggregate import top_k_per_group
+from compact import decode_ips
 
 
 def clean_api_endpoint(data):
     ## prepare and clean dataframe
-    data_with_api = data[data["request_url"].str.contains("api")].copy()
-    data_with_api["request_url"]
-    # remove basepath from api
-    data_with_api["endpoint"] = data_with_api["request_url"].str.replace(r'.*/api','',regex=True)
-    # remove parameters from api
-    data_with_api["endpoint"] = data_with_api["endpoint"].apply(lambda x: re.sub(r'\?.*', '', x))
+    log = as_logframe(data)
+    data_with_api = log.api.copy()
+    # basepath and parameters are already removed from the api path by LogFrame
+    data_with_api["endpoint"] = data_with_api["path"]
     
-    # remove unnecessary direction (include UUID and encoded format) for same endpoint
-    data_with_api["endpoint_cleaned"] = data_with_api["endpoint"].apply(clean_endpoint)
-    data_with_api["endpoint_cleaned"] = data_with_api["endpoint_cleaned"].apply(clean_UUID)
-    data_with_api["endpoint_cleaned"] = data_with_api["endpoint_cleaned"].apply(clean_percent_encoded_path)
+    # remove unnecessary direction (include UUID, ids and encoded format) for same endpoint,
+    # templating each distinct endpoint once (see endpoints.template_endpoints)
+    data_with_api["endpoint_cleaned"] = log.endpoint
     
     return data_with_api
 
-def get_highest_traffic_endpoint_per_ip(data):
+def get_highest_traffic_endpoint_per_ip(data, k=1):
     data_with_api = clean_api_endpoint(data)
     
     ## find the highest-traffic-endpoint for each ip
-    grouped_data = data_with_api.groupby(["client_ip", "endpoint_cleaned"]).size()
-    unstacked_data = grouped_data.unstack(fill_value=0)
-    max_requests_per_ip = unstacked_data.max(axis=1)
-    max_endpoint_per_ip = unstacked_data.idxmax(axis=1)
+    # sort the observed (ip, endpoint) pairs instead of unstacking a dense ip x endpoint matrix
+    grouped_data = data_with_api.groupby(["client_ip", "endpoint_cleaned"], observed=True).size()
+    # compact logs keep client_ip packed as uint32; rank on the dotted strings so the
+    # ips come out in the same order as for plain logs
+    grouped_data = decode_ips(grouped_data.rename("count").reset_index()).set_index(
+        ["client_ip", "endpoint_cleaned"])["count"]
+    top_endpoints = top_k_per_group(grouped_data, k)
 
-    max_requests_per_ip_df = pd.DataFrame({
-        "max_requests": max_requests_per_ip,
-        "max_endpoint": max_endpoint_per_ip
-    }).reset_index()
-
-    max_requests_per_ip_df.rename(columns={'index': 'client_ip'}, inplace=True)
+    # with k > 1 each ip has up to k rows, ordered by descending requests
+    max_requests_per_ip_df = top_endpoints.rename(
+        columns={"count": "max_requests", "endpoint_cleaned": "max_endpoint"}
+    )[["client_ip", "max_requests", "max_endpoint"]]
     return max_requests_per_ip_df
 
 
-def plot_top_n_endpoints(df, n):
+def plot_top_n_endpoints(df, n, show=True):
     # First, ensure the total requests per endpoint is correctly calculated
     endpoint_totals = df.groupby('max_endpoint')['max_requests'].sum()
 
@@ -49,13 +50,19 @@ def plot_top_n_endpoints(df, n):
     # Filter the original dataframe to only include the top 'n' endpoints
     filtered_df = df[df['max_endpoint'].isin(top_endpoints.index)]
 
-    # Now group by 'max_endpoint' and 'client_ip', summing requests for stacking
-    grouped_data = filtered_df.groupby(['max_endpoint', 'client_ip'])['max_requests'].sum().unstack(fill_value=0)
-    sorted_grouped_data = grouped_data.sum(axis=1).sort_values(ascending=False).index
-    sorted_grouped_data = grouped_data.loc[sorted_grouped_data]
+    # Now group by 'max_endpoint' and 'client_ip', summing requests for stacking.
+    # Each (endpoint, ip) pair stays one row; its bar starts where the previous ip of that endpoint ended
+    grouped_data = filtered_df.groupby(['client_ip', 'max_endpoint'])['max_requests'].sum().reset_index()
+    grouped_data['bottom'] = grouped_data.groupby('max_endpoint')['max_requests'].cumsum() - grouped_data['max_requests']
+    position = pd.Series(range(len(top_endpoints)), index=top_endpoints.index)
 
     # Plotting
-    ax = sorted_grouped_data.plot(kind='bar', stacked=True, figsize=(10, 7))
+    fig, ax = plt.subplots(figsize=(10, 7))
+    for client_ip, group in grouped_data.groupby('client_ip'):
+        ax.bar(position[group['max_endpoint']].values, group['max_requests'].values,
+               bottom=group['bottom'].values, width=0.5, label=client_ip)
+    ax.set_xticks(range(len(top_endpoints)))
+    ax.set_xticklabels(top_endpoints.index)
     ax.set_title(f'Top {n} Most Frequently Popular Endpoints)')
     ax.set_xlabel('Endpoint')
     ax.set_ylabel('Total Requests')
@@ -63,4 +70,7 @@ def plot_top_n_endpoints(df, n):
     plt.legend(title='Client IP', bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
 
-    plt.show()
+    # the batch report saves the figure instead of showing it
+    if show:
+        plt.show()
+    return fig
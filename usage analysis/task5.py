@@ -1,7 +1,17 @@
 import matplotlib.pyplot as plt
 from urllib.parse import urlparse, parse_qs
 
+from logframe import LogFrame
+from param_index import ParamIndex
+
 def count_parameter_values_for_endpoint(data, endpoint, parameter):
+    # A ParamIndex, or the index a LogFrame builds once, answers with a dictionary read.
+    # Endpoints are then matched by template, e.g. /issues/42 counts with /issues/{id}
+    if isinstance(data, LogFrame):
+        data = data.param_index
+    if isinstance(data, ParamIndex):
+        return data.lookup(endpoint, parameter)
+
     # Check if the endpoint starts with '/api'
     if not endpoint.startswith('/api'):
         endpoint_path = '/api' + endpoint
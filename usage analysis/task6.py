@@ -1,22 +1,47 @@
 import pandas as pd
-import re
+from logframe import as_logframe
+from sketches import LatencySketch
+from compact import decode_ips
 
-def get_avg_processing_time(data, separate_by_ip=False):
-    # Calculate total processing time
-    data["processing_time"] = data["request_processing_time"] + data["target_processing_time"] + data["response_processing_time"]
-    
-    # Filter rows where the URL contains "api" and extract the path
-    data_api = data[data["request_url"].str.contains("api")].copy()
-    data_api["path"] = data_api["request_url"].str.replace(r'.*/api','',regex=True)
-    data_api["path"] = data_api["path"].apply(lambda x: re.sub(r'\?.*', '', x))
+def get_processing_time_sketch(data, separate_by_ip=False, relative_accuracy=0.01):
+    """
+    Build a mergeable latency sketch of the api processing time per verb/path (and ip).
+    Sketches of different chunks, days or processes combine with sketch.merge(other).
+    """
+    data_api = as_logframe(data).api
+    grouping_columns = ['request_verb', 'path']
+    if separate_by_ip:
+        grouping_columns.append('client_ip')
+    sketch = LatencySketch(grouping_columns, relative_accuracy)
+    return sketch.update(data_api, 'processing_time')
+
+
+def get_avg_processing_time(data, separate_by_ip=False, percentiles=None):
+    """
+    Mean and variance of the api processing time per verb/path, optionally per ip.
+    If percentiles is given, e.g. (50, 95, 99), columns p50, p95, p99 are added from a
+    latency sketch with 1% relative error (see sketches.LatencySketch), built in the same
+    pass that computes the mean and variance. Groups with no processing time at all get
+    NaN, as without percentiles.
+    """
+    # Total processing time, api rows and their path are parsed once by LogFrame
+    data_api = as_logframe(data).api
     
     # Define grouping criteria based on whether data is separated by client IP
     grouping_columns = ['request_verb', 'path']
     if separate_by_ip:
         grouping_columns.append('client_ip')
 
+    if percentiles:
+        # one pass: the sketch keeps the mean/variance moments next to the latency buckets
+        sketch = LatencySketch(grouping_columns).update(data_api, 'processing_time')
+        result = sketch.summary().sort_values(grouping_columns).reset_index(drop=True)
+        result = result.drop(columns='count').rename(columns={'mean': 'Average Processing Time', 'var': 'Variance'})
+        quantiles = sketch.quantiles([p / 100 for p in percentiles])
+        return decode_ips(result.merge(quantiles, on=grouping_columns, how='left'))
+
     # Group data by the specified criteria
-    grouped = data_api.groupby(grouping_columns)['processing_time']
+    grouped = data_api.groupby(grouping_columns, observed=True)['processing_time']
     
     # Calculate mean and variance for each group
     result = grouped.agg(['mean', 'var']).reset_index()
@@ -24,4 +49,5 @@ def get_avg_processing_time(data, separate_by_ip=False):
     # Rename columns for clarity
     result.rename(columns={'mean': 'Average Processing Time', 'var': 'Variance'}, inplace=True)
 
-    return result
+    # compact logs keep client_ip packed as uint32
+    return decode_ips(result)
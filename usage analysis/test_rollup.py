@@ -0,0 +1,27 @@
+import pandas as pd
+from rollup import RollupCube
+from synthetic import generate_logs
+
+
+def test_update_without_search_rows():
+    logs = generate_logs(2000, days=2, seed=1)
+    quiet = logs[~logs["request_url"].str.contains("fuzzySearch")]
+
+    cube = RollupCube(freq="D").update(quiet)
+
+    assert cube.rows["count"].sum() == quiet["request_url"].str.contains("api").sum()
+    assert cube.rows["section"].isna().all()
+    assert cube.search_counts("section").empty
+
+
+def test_replace_from_with_utc_buckets():
+    logs = generate_logs(2000, days=3, start="2024-05-08", seed=2)
+    cube = RollupCube(freq="D").update(logs)
+    assert cube.rows["bucket"].dt.tz is not None
+
+    day = logs[logs["time"] >= "2024-05-09"]
+    total = cube.rows["count"].sum()
+    cube.update(day, replace_from="2024-05-09")
+
+    assert cube.rows["count"].sum() == total
+    assert cube.search_counts(["bucket"]).index.min() == pd.Timestamp("2024-05-08", tz="UTC")